@@ -0,0 +1 @@
+"""Benchmarks of pqr, which can be run with airspeed velocity (asv)."""
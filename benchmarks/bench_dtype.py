@@ -0,0 +1,93 @@
+"""Benchmarks of computations in float32 against float64: speed, memory and precision."""
+
+from __future__ import annotations
+
+import numpy as np
+
+import pqr
+from benchmarks.common import SIZES, make_prices, make_universe, make_volume
+
+
+class _Strategy:
+    params = (SIZES, ["float64", "float32"])
+    param_names = ["shape", "dtype"]
+    timeout = 600
+
+    def setup(self, shape, dtype):
+        self.prices = make_prices(*shape)
+        self.volume = make_volume(self.prices)
+        universe = make_universe(self.prices, self.volume)
+        universe_returns = pqr.to_returns(self.prices)
+
+        self.picking = pqr.compose(
+            pqr.freeze(pqr.filter, universe=universe),
+            pqr.freeze(pqr.look_back, period=12, agg="median"),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=12),
+            pqr.freeze(pqr.quantiles, min_q=0.7, max_q=1),
+            panel=True,
+        )
+        self.strategy = pqr.compose(
+            self.picking,
+            pqr.freeze(pqr.allocate, weights=self.volume),
+            pqr.freeze(pqr.evaluate, universe_returns=universe_returns),
+            panel=True,
+        )
+
+
+class Strategy(_Strategy):
+    def time_strategy(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            self.strategy(self.prices)
+
+    def peakmem_strategy(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            self.strategy(self.prices)
+
+
+class Ops(_Strategy):
+    def setup(self, shape, dtype):
+        super().setup(shape, dtype)
+        with pqr.config(dtype=dtype):
+            self.factor = pqr.filter(self.prices, universe=self.prices.notna())
+            self.signals = self.picking(self.prices)
+
+    def time_look_back_median(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            pqr.look_back(self.factor, period=20, agg="median")
+
+    def time_quantiles(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            pqr.quantiles(self.factor, min_q=0.7, max_q=1)
+
+    def time_top(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            pqr.top(self.factor, k=10)
+
+    def time_allocate(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            pqr.allocate(self.signals, weights=self.volume)
+
+
+class Precision(_Strategy):
+    """Differences of float32 results from float64 ones (zeros for float64 itself)."""
+
+    params = (SIZES[:1], ["float32"])
+    unit = "abs. difference"
+
+    def _run(self, dtype):
+        with pqr.config(dtype=dtype):
+            return self.strategy(self.prices).to_numpy()
+
+    def track_max_returns_error(self, shape, dtype):
+        return float(np.max(np.abs(self._run(dtype) - self._run("float64"))))
+
+    def track_total_returns_error(self, shape, dtype):
+        return float(abs(np.sum(self._run(dtype)) - np.sum(self._run("float64"))))
+
+    def track_changed_signals_share(self, shape, dtype):
+        with pqr.config(dtype=dtype):
+            signals = np.asarray(self.picking(self.prices))
+        return float(np.mean(signals != np.asarray(self.picking(self.prices))))
+
+    track_changed_signals_share.unit = "share"
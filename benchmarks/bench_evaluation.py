@@ -0,0 +1,26 @@
+"""Benchmarks of evaluation operations."""
+
+from __future__ import annotations
+
+import pqr
+from benchmarks.common import make_factor
+
+
+class EvaluateMany:
+    params = ([(1_000, 500), (5_000, 1_000)], [10, 50])
+    param_names = ["shape", "n_portfolios"]
+
+    def setup(self, shape, n_portfolios):
+        self.universe_returns = pqr.to_returns(make_factor(*shape, nan_share=0).abs())
+        factor = make_factor(*shape, seed=1)
+        self.holdings = {
+            i: pqr.ew(pqr.quantiles(factor, min_q=i / n_portfolios, max_q=1))
+            for i in range(n_portfolios)
+        }
+
+    def time_evaluate_many(self, shape, n_portfolios):
+        pqr.evaluate_many(self.holdings, universe_returns=self.universe_returns)
+
+    def time_evaluate_each(self, shape, n_portfolios):
+        for holdings in self.holdings.values():
+            pqr.evaluate(holdings, universe_returns=self.universe_returns)
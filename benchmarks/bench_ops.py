@@ -0,0 +1,127 @@
+"""Benchmarks of every public operation on synthetic panels of different sizes."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import pqr
+from benchmarks.common import SIZES, make_prices, make_universe, make_volume
+
+
+class _Market:
+    params = (SIZES,)
+    param_names = ["shape"]
+    timeout = 600
+
+    def setup(self, shape, *args):
+        self.prices = make_prices(*shape)
+        self.volume = make_volume(self.prices)
+        self.universe = make_universe(self.prices, self.volume)
+        self.factor = pqr.look_back(self.prices, period=20, agg="pct")
+        self.signals = pqr.quantiles(self.factor, min_q=0.7, max_q=1)
+
+
+class Filter(_Market):
+    def time_filter(self, shape):
+        pqr.filter(self.prices, universe=self.universe)
+
+
+class LookBack(_Market):
+    params = (
+        SIZES,
+        ["pct", "mean", "median", "min", "max", "std", "var", "sum", "skew", "zscore"],
+    )
+    param_names = ["shape", "agg"]
+
+    def time_look_back(self, shape, agg):
+        pqr.look_back(self.prices, period=20, agg=agg)
+
+
+class Lag(_Market):
+    def time_lag(self, shape):
+        pqr.lag(self.factor, period=1)
+
+    def time_lag_many_stack(self, shape):
+        pqr.lag_many(self.factor, periods=range(25)).stack()
+
+
+class Hold(_Market):
+    def time_hold(self, shape):
+        pqr.hold(self.factor, period=12)
+
+
+class Picking(_Market):
+    def time_quantiles(self, shape):
+        pqr.quantiles(self.factor, min_q=0.7, max_q=1)
+
+    def time_top(self, shape):
+        pqr.top(self.factor, k=10)
+
+    def time_bottom(self, shape):
+        pqr.bottom(self.factor, k=10)
+
+
+class Allocation(_Market):
+    def setup(self, shape):
+        super().setup(shape)
+        self.holdings = pqr.ew(self.signals)
+        self.leverage = pd.Series(
+            np.random.default_rng(2).uniform(0.5, 1.5, len(self.holdings)),
+            index=self.holdings.index,
+        )
+
+    def time_allocate(self, shape):
+        pqr.allocate(self.signals, weights=self.volume)
+
+    def time_ew(self, shape):
+        pqr.ew(self.signals)
+
+    def time_scale(self, shape):
+        pqr.scale(self.holdings, leverage=self.leverage)
+
+    def time_limit(self, shape):
+        pqr.limit(self.holdings * 2, min_leverage=0.5, max_leverage=1.5)
+
+
+class Packed(_Market):
+    def setup(self, shape):
+        super().setup(shape)
+        self.packed = pqr.PackedSignals.from_frame(self.signals)
+        self.other = pqr.PackedSignals.from_frame(pqr.top(self.factor, k=10))
+
+    def time_pack(self, shape):
+        pqr.PackedSignals.from_frame(self.signals)
+
+    def time_count(self, shape):
+        self.packed.count()
+
+    def time_and(self, shape):
+        self.packed & self.other
+
+    def time_invert(self, shape):
+        ~self.packed
+
+    def time_ew_packed(self, shape):
+        pqr.ew(self.packed)
+
+    def time_allocate_packed(self, shape):
+        pqr.allocate(self.packed, weights=self.volume)
+
+    def track_memory_ratio(self, shape):
+        return self.signals.to_numpy().nbytes / self.packed.nbytes
+
+    track_memory_ratio.unit = "times"
+
+
+class Evaluation(_Market):
+    def setup(self, shape):
+        super().setup(shape)
+        self.holdings = pqr.ew(self.signals)
+        self.universe_returns = pqr.to_returns(self.prices)
+
+    def time_evaluate(self, shape):
+        pqr.evaluate(self.holdings, universe_returns=self.universe_returns)
+
+    def time_to_returns(self, shape):
+        pqr.to_returns(self.prices)
@@ -0,0 +1,138 @@
+"""Benchmarks of picking operations."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+import pqr
+from benchmarks.common import make_factor
+from pqr.picking import bn, _rolling_apply
+
+
+def _top_apply_along_axis(factor: pd.DataFrame, *, k: int) -> pd.DataFrame:
+    # implementation of pqr.top prior to vectorized thresholds, kept as a reference
+    def _top_k_row(arr: np.ndarray) -> float:
+        uniq_arr = np.unique(arr[~np.isnan(arr)])
+        max_k = len(uniq_arr)
+
+        if max_k > k:
+            return np.sort(uniq_arr)[-k]
+        elif max_k > 0:
+            return np.max(uniq_arr)
+        else:
+            return np.nan
+
+    factor_arr = np.asarray(factor)
+    lower = np.apply_along_axis(_top_k_row, axis=1, arr=factor_arr)[:, np.newaxis]
+    return pd.DataFrame(
+        factor_arr >= lower,
+        index=factor.index.copy(),
+        columns=factor.columns.copy(),
+    )
+
+
+class TopBottom:
+    params = ([(20_000, 50), (5_000, 500), (5_000, 3_000)], [10, 100])
+    param_names = ["shape", "k"]
+
+    def setup(self, shape, k):
+        self.factor = make_factor(*shape)
+        self.tied_factor = self.factor.round(1)
+
+    def time_top(self, shape, k):
+        pqr.top(self.factor, k=k)
+
+    def time_top_tied(self, shape, k):
+        pqr.top(self.tied_factor, k=k)
+
+    def time_bottom(self, shape, k):
+        pqr.bottom(self.factor, k=k)
+
+    def time_top_apply_along_axis(self, shape, k):
+        _top_apply_along_axis(self.factor, k=k)
+
+    def time_top_apply_along_axis_tied(self, shape, k):
+        _top_apply_along_axis(self.tied_factor, k=k)
+
+
+class Buckets:
+    params = ([(1_000, 500), (5_000, 3_000)], [3, 10])
+    param_names = ["shape", "n_buckets"]
+
+    def setup(self, shape, n_buckets):
+        self.factor = make_factor(*shape)
+        self.q = np.linspace(0, 1, n_buckets + 1)
+
+    def time_buckets(self, shape, n_buckets):
+        pqr.buckets(self.factor, q=self.q)
+
+    def time_quantiles_one_band(self, shape, n_buckets):
+        pqr.quantiles(self.factor, min_q=self.q[-2], max_q=self.q[-1])
+
+    def time_quantiles_every_band(self, shape, n_buckets):
+        for min_q, max_q in zip(self.q[:-1], self.q[1:]):
+            pqr.quantiles(self.factor, min_q=min_q, max_q=max_q)
+
+
+class LookBackMedian:
+    params = ([(2_000, 1_000)], [5, 20, 60, 250])
+    param_names = ["shape", "period"]
+
+    def setup(self, shape, period):
+        self.factor = make_factor(*shape)
+        self.factor_arr = self.factor.to_numpy()
+
+    def time_look_back_median(self, shape, period):
+        pqr.look_back(self.factor, period=period, agg="median")
+
+    def time_pandas_rolling_median(self, shape, period):
+        self.factor.rolling(period).median()
+
+    def time_strided_median(self, shape, period):
+        _rolling_apply(self.factor_arr, period, lambda windows: np.median(windows, axis=1))
+
+    def time_bottleneck_median(self, shape, period):
+        if bn is None:
+            raise NotImplementedError("bottleneck is not installed")
+        bn.move_median(self.factor_arr, period, axis=0)
+
+
+def _hold_take_along_axis(factor: pd.DataFrame, *, period: int) -> pd.DataFrame:
+    # implementation of pqr.hold prior to gathering rows, kept as a reference
+    periods = np.zeros(len(factor), dtype=int)
+    update_periods = np.arange(len(factor), step=period)
+    periods[update_periods] = update_periods
+    update_mask = np.maximum.accumulate(periods[:, np.newaxis], axis=0)
+    return pd.DataFrame(
+        np.take_along_axis(np.asarray(factor, dtype=float), update_mask, axis=0),
+        index=factor.index.copy(),
+        columns=factor.columns.copy()
+    )
+
+
+class Hold:
+    params = ([(1_000, 500), (10_000, 5_000)], [3, 12])
+    param_names = ["shape", "period"]
+    timeout = 300
+
+    def setup(self, shape, period):
+        self.factor = make_factor(*shape)
+
+    def time_hold(self, shape, period):
+        pqr.hold(self.factor, period=period)
+
+    def time_hold_lazy(self, shape, period):
+        pqr.hold(self.factor, period=period, lazy=True)
+
+    def time_hold_take_along_axis(self, shape, period):
+        _hold_take_along_axis(self.factor, period=period)
+
+    def peakmem_hold(self, shape, period):
+        pqr.hold(self.factor, period=period)
+
+    def peakmem_hold_lazy(self, shape, period):
+        pqr.hold(self.factor, period=period, lazy=True)
+
+    def peakmem_hold_take_along_axis(self, shape, period):
+        _hold_take_along_axis(self.factor, period=period)
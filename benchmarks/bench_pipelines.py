@@ -0,0 +1,80 @@
+"""Benchmarks of full strategies from the quickstart."""
+
+from __future__ import annotations
+
+import pqr
+from benchmarks.common import SIZES, make_prices, make_universe, make_volume
+
+
+class Quickstart:
+    params = (SIZES, [False, True])
+    param_names = ["shape", "panel"]
+    timeout = 600
+
+    def setup(self, shape, panel):
+        self.prices = make_prices(*shape)
+        universe = make_universe(self.prices, make_volume(self.prices))
+        universe_returns = pqr.to_returns(self.prices)
+
+        self.momentum = pqr.compose(
+            # picking
+            pqr.freeze(pqr.filter, universe=universe),
+            pqr.freeze(pqr.look_back, period=12, agg="pct"),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=12),
+            pqr.freeze(pqr.quantiles, min_q=0.7, max_q=1),
+            # allocation
+            pqr.ew,
+            # evaluation
+            pqr.freeze(pqr.evaluate, universe_returns=universe_returns),
+            panel=panel,
+        )
+        self.top_mean = pqr.compose(
+            pqr.freeze(pqr.filter, universe=universe),
+            pqr.freeze(pqr.look_back, period=20, agg="mean"),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=5),
+            pqr.freeze(pqr.top, k=10),
+            pqr.ew,
+            pqr.freeze(pqr.evaluate, universe_returns=universe_returns),
+            panel=panel,
+        )
+
+    def time_momentum(self, shape, panel):
+        self.momentum(self.prices)
+
+    def time_top_mean(self, shape, panel):
+        self.top_mean(self.prices)
+
+    def peakmem_momentum(self, shape, panel):
+        self.momentum(self.prices)
+
+
+class Chunked:
+    params = (SIZES, [None, 10_000_000])
+    param_names = ["shape", "memory_budget"]
+    timeout = 600
+
+    def setup(self, shape, memory_budget):
+        self.prices = make_prices(*shape)
+        volume = make_volume(self.prices)
+        self.steps = [
+            pqr.freeze(pqr.filter, universe=make_universe(self.prices, volume)),
+            pqr.freeze(pqr.look_back, period=12, agg="pct"),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=12),
+            pqr.freeze(pqr.quantiles, min_q=0.7, max_q=1),
+            pqr.freeze(pqr.allocate, weights=volume),
+        ]
+
+    def _run(self, memory_budget):
+        if memory_budget is None:
+            pqr.compose(*self.steps)(self.prices)
+        else:
+            pqr.run_chunked(self.steps, self.prices, memory_budget=memory_budget)
+
+    def time_momentum(self, shape, memory_budget):
+        self._run(memory_budget)
+
+    def peakmem_momentum(self, shape, memory_budget):
+        self._run(memory_budget)
@@ -0,0 +1,142 @@
+"""Benchmarks and equivalence checks of streaming and incremental computations.
+
+Tracked numbers of mismatched values must be zero: outputs of streaming steps, concatenated over
+random splits into chunks, and holdings and returns of an incremental backtest, updated row by
+row, are compared with the in-memory run bit for bit. The checks can also be run without asv::
+
+    python -m benchmarks.bench_streaming
+"""
+
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import pqr
+from benchmarks.common import SIZES, make_prices, make_universe, make_volume
+
+
+class Streaming:
+    params = (SIZES[:2], [0, 1])
+    param_names = ["shape", "seed"]
+    timeout = 600
+
+    def setup(self, shape, seed):
+        self.prices = make_prices(*shape)
+        self.universe = make_universe(self.prices, make_volume(self.prices))
+        self.universe_returns = pqr.to_returns(self.prices)
+        self.factor = pqr.filter(self.prices, universe=self.universe)
+        self.signals = pqr.quantiles(self.factor, min_q=0.7, max_q=1)
+        self.holdings = pqr.ew(self.signals)
+        self.bounds = _random_bounds(len(self.prices), n_chunks=20, seed=seed)
+
+    def _stream(self, step, matrix):
+        return pd.concat([step(matrix.iloc[start:stop]) for start, stop in self.bounds])
+
+    def time_look_back(self, shape, seed):
+        self._stream(pqr.StreamingLookBack(period=12, agg="pct"), self.factor)
+
+    def time_hold(self, shape, seed):
+        self._stream(pqr.StreamingHold(period=12), self.signals)
+
+    def track_mismatches(self, shape, seed):
+        n_mismatches = 0
+        for agg in ["pct", "min", "max", "median"]:
+            n_mismatches += _mismatches(
+                self._stream(pqr.StreamingLookBack(period=12, agg=agg), self.factor),
+                pqr.look_back(self.factor, period=12, agg=agg),
+            )
+        for period in [0, 1, 3, -2]:
+            n_mismatches += _mismatches(
+                self._stream(pqr.StreamingLag(period=period), self.factor),
+                pqr.lag(self.factor, period=period),
+            )
+        n_mismatches += _mismatches(
+            self._stream(pqr.StreamingHold(period=12), self.signals),
+            pqr.hold(self.signals, period=12),
+        )
+        n_mismatches += _mismatches(
+            self._stream(
+                pqr.StreamingEvaluate(universe_returns=self.universe_returns),
+                self.holdings,
+            ),
+            pqr.evaluate(self.holdings, universe_returns=self.universe_returns),
+        )
+        return n_mismatches
+
+    track_mismatches.unit = "values"
+
+
+class Incremental:
+    params = (SIZES[:2], ["pct", "median", "max"])
+    param_names = ["shape", "agg"]
+    timeout = 600
+
+    number = 1  # updates change the state, which is restored by setup before every repeat
+    n_updates = 50
+
+    def setup(self, shape, agg):
+        self.prices = make_prices(*shape)
+        self.universe = make_universe(self.prices, make_volume(self.prices))
+        self.strategy = pqr.compose(
+            pqr.freeze(pqr.filter, universe=self.universe),
+            pqr.freeze(pqr.look_back, period=12, agg=agg),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=5),
+            pqr.freeze(pqr.quantiles, min_q=0.7, max_q=1),
+            pqr.ew,
+            pqr.freeze(pqr.evaluate, universe_returns=pqr.to_returns(self.prices)),
+        )
+        self.backtest = pqr.IncrementalBacktest(self.strategy)
+        self.backtest.warm_up(self.prices.iloc[:-self.n_updates])
+
+    def _update(self):
+        holdings, returns = [], []
+        for timestamp, row in self.prices.iloc[-self.n_updates:].iterrows():
+            update = self.backtest.update(row, universe=self.universe.loc[timestamp])
+            holdings.append(update.holdings)
+            returns.append(update.returns)
+        return pd.DataFrame(holdings), pd.Series(returns, index=[h.name for h in holdings])
+
+    def time_update(self, shape, agg):
+        self._update()
+
+    def track_mismatches(self, shape, agg):
+        holdings, returns = self._update()
+        expected_holdings = self.strategy[:-1](self.prices).iloc[-self.n_updates:]
+        expected_returns = self.strategy(self.prices).iloc[-self.n_updates:]
+        return (_mismatches(holdings, expected_holdings)
+                + _mismatches(returns, expected_returns.rename(None)))
+
+    track_mismatches.unit = "values"
+
+
+def _random_bounds(n_rows: int, *, n_chunks: int, seed: int) -> list[tuple[int, int]]:
+    # chunks of random lengths, including empty ones and ones shorter than look back periods
+    rng = np.random.default_rng(seed)
+    cuts = rng.integers(0, n_rows + 1, n_chunks - 2)
+    cuts = np.sort(np.concatenate([cuts, cuts[:1]]))  # the repeated cut gives an empty chunk
+    cuts = np.concatenate([[0], cuts, [n_rows]])
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _mismatches(result: pd.DataFrame | pd.Series, expected: pd.DataFrame | pd.Series) -> int:
+    if not result.index.equals(expected.index) or result.shape != expected.shape:
+        return expected.size
+    result_arr, expected_arr = result.to_numpy(), expected.to_numpy()
+    same = result_arr == expected_arr
+    if expected_arr.dtype.kind == "f":
+        same |= np.isnan(result_arr) & np.isnan(expected_arr)
+    return int(np.count_nonzero(~same))
+
+
+if __name__ == "__main__":
+    for benchmark in [Streaming, Incremental]:
+        for params in itertools.product(*benchmark.params):
+            instance = benchmark()
+            instance.setup(*params)
+            n_mismatches = instance.track_mismatches(*params)
+            print(f"{benchmark.__name__}{params}: {n_mismatches} mismatches")
+            assert n_mismatches == 0
@@ -0,0 +1,63 @@
+"""Benchmarks of utilities."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+import pqr
+from benchmarks.common import make_factor
+
+
+def _align_pairwise(*args: pd.DataFrame) -> tuple[pd.DataFrame, ...]:
+    # implementation of pqr.align prior to n-way alignment, kept as a reference
+    args = list(args)
+    for i in range(len(args) - 1):
+        args[i], args[i + 1] = args[i].align(args[i + 1], join="inner")
+    for i in range(len(args) - 2, 0, -1):
+        args[i], args[i - 1] = args[i].align(args[i - 1], join="inner")
+    return tuple(args)
+
+
+class Align:
+    params = ([(1_000, 500), (5_000, 1_000)], [2, 4, 8, 16])
+    param_names = ["shape", "n_inputs"]
+
+    def setup(self, shape, n_inputs):
+        factor = make_factor(*shape)
+        # every input misses a couple of its own periods and assets
+        self.misaligned = [factor.drop(index=factor.index[i::50], columns=factor.columns[i::50])
+                           for i in range(n_inputs)]
+        self.aligned = [factor.copy() for _ in range(n_inputs)]
+
+    def time_align_misaligned(self, shape, n_inputs):
+        pqr.align(*self.misaligned)
+
+    def time_align_aligned(self, shape, n_inputs):
+        pqr.align(*self.aligned)
+
+    def time_align_pairwise_misaligned(self, shape, n_inputs):
+        _align_pairwise(*self.misaligned)
+
+    def time_align_pairwise_aligned(self, shape, n_inputs):
+        _align_pairwise(*self.aligned)
+
+
+class PipelinePanel:
+    params = ([(250, 50), (1_000, 500), (5_000, 1_000)], [False, True])
+    param_names = ["shape", "panel"]
+
+    def setup(self, shape, panel):
+        self.factor = make_factor(*shape)
+        universe = self.factor.notna()
+        self.pipeline = pqr.compose(
+            pqr.freeze(pqr.filter, universe=universe),
+            pqr.freeze(pqr.look_back, period=3, agg="pct"),
+            pqr.freeze(pqr.lag, period=1),
+            pqr.freeze(pqr.hold, period=3),
+            pqr.freeze(pqr.thresholds, min_t=0, max_t=1),
+            pqr.ew,
+            panel=panel,
+        )
+
+    def time_pipeline(self, shape, panel):
+        self.pipeline(self.factor)
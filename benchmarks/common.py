@@ -0,0 +1,88 @@
+"""Synthetic data for benchmarks.
+
+Sizes of benchmarked panels are controlled by environment variables:
+
+* PQR_BENCH_LARGE - if set to 1, large panels up to 10000 x 10000 are benchmarked too (they need
+  several gigabytes of memory);
+* PQR_BENCH_NAN_SHARE - share of missing values in generated panels, 0.1 by default.
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+SIZES = [(250, 50), (1_000, 500), (2_500, 1_000)]
+LARGE_SIZES = [(5_000, 3_000), (10_000, 10_000)]
+if os.environ.get("PQR_BENCH_LARGE") == "1":
+    SIZES = SIZES + LARGE_SIZES
+
+NAN_SHARE = float(os.environ.get("PQR_BENCH_NAN_SHARE", 0.1))
+
+
+def make_factor(
+        n_periods: int,
+        n_assets: int,
+        *,
+        nan_share: float = 0.1,
+        seed: int = 0,
+) -> pd.DataFrame:
+    """Generates matrix with random factor values and `nan_share` of missing values."""
+
+    rng = np.random.default_rng(seed)
+    factor = rng.standard_normal((n_periods, n_assets))
+    factor[rng.random((n_periods, n_assets)) < nan_share] = np.nan
+    return pd.DataFrame(
+        factor,
+        index=pd.date_range("2000-01-01", periods=n_periods, freq="D"),
+        columns=[f"asset_{i}" for i in range(n_assets)],
+    )
+
+
+def make_prices(
+        n_periods: int,
+        n_assets: int,
+        *,
+        nan_share: float = NAN_SHARE,
+        seed: int = 0,
+) -> pd.DataFrame:
+    """Generates close prices of assets as geometric random walks.
+
+    Assets are listed and delisted at random periods, so about `nan_share` of prices are missing
+    at the start and at the end of the history, as in real data.
+    """
+
+    rng = np.random.default_rng(seed)
+    log_returns = rng.normal(0.0003, 0.02, size=(n_periods, n_assets))
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+
+    # every asset misses nan_share of periods in total: some before listing, some after delisting
+    n_missing = rng.binomial(n_periods, nan_share, size=n_assets)
+    n_before = (rng.random(n_assets) * (n_missing + 1)).astype(int)
+    n_after = n_missing - n_before
+    rows = np.arange(n_periods)[:, np.newaxis]
+    prices[(rows < n_before) | (rows >= n_periods - n_after)] = np.nan
+    return pd.DataFrame(
+        prices,
+        index=pd.date_range("2000-01-01", periods=n_periods, freq="D"),
+        columns=[f"asset_{i}" for i in range(n_assets)],
+    )
+
+
+def make_volume(prices: pd.DataFrame, *, seed: int = 1) -> pd.DataFrame:
+    """Generates traded volume of assets, which is missing where `prices` are missing."""
+
+    rng = np.random.default_rng(seed)
+    n_periods, n_assets = prices.shape
+    liquidity = rng.lognormal(10, 1, size=n_assets)
+    volume = rng.lognormal(0, 0.5, size=(n_periods, n_assets)) * liquidity
+    volume[np.isnan(prices.to_numpy())] = np.nan
+    return pd.DataFrame(volume, index=prices.index, columns=prices.columns)
+
+
+def make_universe(prices: pd.DataFrame, volume: pd.DataFrame) -> pd.DataFrame:
+    """Defines tradable universe as assets with price above 10 and volume above the median."""
+
+    return (prices > 10) & volume.gt(volume.median(axis=1), axis=0)
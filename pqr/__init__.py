@@ -1,6 +1,13 @@
 """Lightweight library for backtesting factor strategies."""
 
 from pqr.allocation import *
+from pqr.chunked import *
+from pqr.config import *
 from pqr.evaluation import *
+from pqr.grid import *
+from pqr.incremental import *
+from pqr.panel import *
 from pqr.picking import *
+from pqr.storage import *
+from pqr.streaming import *
 from pqr.utils import *
@@ -5,13 +5,18 @@ from __future__ import annotations
 __all__ = [
     "allocate",
     "ew",
+    "ew_many",
     "scale",
     "limit",
 ]
 
+from typing import Dict, Hashable, Mapping
+
 import numpy as np
 import pandas as pd
 
+from pqr.config import _float_dtype
+from pqr.panel import PackedSignals, _like
 from pqr.utils import align
 
 
@@ -26,7 +31,7 @@ def allocate(
 
     Parameters
     ----------
-    signals : pd.DataFrame
+    signals : pd.DataFrame or PackedSignals
         Matrix, consists of True/False, indicating presence of an asset in a portfolio.
     weights : pd.DataFrame
         Matrix with weights (e.g. market capitalization).
@@ -38,24 +43,29 @@ def allocate(
     """
 
     signals, weights = align(signals, weights)
-    signals_arr, weights_arr = np.asarray(signals, dtype=float), np.asarray(weights, dtype=float)
-    signals_arr *= weights_arr
+    # explicit copy, because it is modified inplace
+    signals_arr = np.array(signals, dtype=_float_dtype())
+    signals_arr *= np.asarray(weights, dtype=_float_dtype())
 
-    norm = np.nansum(signals_arr, axis=1, keepdims=True, dtype=float)
+    # sums are accumulated in float64 whatever the dtype of values is
+    norm = np.nansum(signals_arr, axis=1, keepdims=True, dtype=np.float64)
     with np.errstate(divide="ignore", invalid="ignore"):
-        return pd.DataFrame(
-            np.nan_to_num(signals_arr / norm, nan=0, neginf=0, posinf=0),
-            index=signals.index.copy(),
-            columns=signals.columns.copy(),
-        )
+        np.divide(signals_arr, norm, out=signals_arr)
+    return _like(
+        signals,
+        np.nan_to_num(signals_arr, copy=False, nan=0, neginf=0, posinf=0),
+    )
 
 
 def ew(signals: pd.DataFrame) -> pd.DataFrame:
     """Calculates equally-weighted holdings.
 
+    Number of assets in a portfolio is counted on packed bits, if `signals` are
+    :class:`PackedSignals`.
+
     Parameters
     ----------
-    signals : pd.DataFrame
+    signals : pd.DataFrame or PackedSignals
         Matrix, consists of True/False, indicating presence of an asset in a portfolio.
 
     Returns
@@ -64,9 +74,57 @@ def ew(signals: pd.DataFrame) -> pd.DataFrame:
         Matrix of holdings, each row sum equals to 1 and all non-zero row values are the same.
     """
 
+    if isinstance(signals, PackedSignals):
+        with np.errstate(divide="ignore"):
+            weights = 1 / signals.count().to_numpy(dtype=np.float64)
+        return _like(
+            signals,
+            np.where(np.asarray(signals), weights[:, np.newaxis], 0)
+            .astype(_float_dtype(), copy=False),
+        )
+
     return allocate(signals, weights=signals)
 
 
+def ew_many(signals: Mapping[Hashable, pd.DataFrame]) -> Dict[Hashable, pd.DataFrame]:
+    """Calculates equally-weighted holdings for many portfolios at once.
+
+    Signals are aligned with each other and stacked into one 3d array, so all holdings are
+    calculated by one vectorized normalization and returned as views of one 3d array.
+
+    Parameters
+    ----------
+    signals : mapping of pd.DataFrame
+        Mapping from name of a portfolio to matrix, consists of True/False, indicating presence of
+        an asset in a portfolio.
+
+    Returns
+    -------
+    dict of pd.DataFrame
+        Matrices of holdings for every portfolio, each row sum equals to 1 and all non-zero row
+        values are the same.
+    """
+
+    aligned_signals = align(*signals.values())
+    if not aligned_signals:
+        return {}
+
+    holdings_arr = np.stack([np.asarray(s, dtype=_float_dtype()) for s in aligned_signals])
+    holdings_arr *= holdings_arr  # the same as weighting signals by themselves in ew
+
+    norm = np.nansum(holdings_arr, axis=2, keepdims=True, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(holdings_arr, norm, out=holdings_arr)
+    np.nan_to_num(holdings_arr, copy=False, nan=0, neginf=0, posinf=0)
+    return {
+        name: _like(
+            aligned_signals[0],
+            holdings,
+        )
+        for name, holdings in zip(signals, holdings_arr)
+    }
+
+
 def scale(
         holdings: pd.DataFrame,
         *,
@@ -88,10 +146,10 @@ def scale(
     """
 
     holdings, leverage = align(holdings, leverage)
-    return pd.DataFrame(
-        np.asarray(holdings) * np.asarray(leverage)[:, np.newaxis],
-        index=holdings.index.copy(),
-        columns=holdings.columns.copy(),
+    return _like(
+        holdings,
+        (np.asarray(holdings) * np.asarray(leverage)[:, np.newaxis])
+        .astype(_float_dtype(), copy=False),
     )
 
 
@@ -118,7 +176,7 @@ def limit(
         Matrix with scaled weights.
     """
 
-    total_leverage = np.nansum(holdings, axis=1, keepdims=True)
+    total_leverage = np.nansum(np.asarray(holdings), axis=1, dtype=np.float64)
     too_low = total_leverage < min_leverage
     too_high = total_leverage > max_leverage
 
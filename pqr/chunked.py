@@ -0,0 +1,179 @@
+"""Execution of pipelines by blocks of matrices to bound memory usage."""
+
+from __future__ import annotations
+
+__all__ = [
+    "run_chunked",
+]
+
+import os
+import tempfile
+from typing import Any, Callable, Iterable, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from pqr.allocation import allocate, ew, scale, limit
+from pqr.config import _float_dtype
+from pqr.panel import Panel
+from pqr.picking import filter, look_back, lag, hold, quantiles, buckets, top, bottom, thresholds
+from pqr.storage import create
+from pqr.utils import freeze, _flatten_steps
+
+# steps, which transform every asset independently of others
+_COLUMN_WISE = {filter, look_back, lag, hold, thresholds}
+# steps, which transform every period independently of others
+_ROW_WISE = {filter, quantiles, buckets, top, bottom, thresholds, allocate, ew, scale, limit}
+
+# estimated number of temporary float arrays of the size of a block, created by a step
+_N_TEMPORARIES = 8
+
+
+def run_chunked(
+        steps: Iterable[Callable],
+        factor: pd.DataFrame | Panel,
+        *,
+        memory_budget: int,
+        out_dir: Optional[str | os.PathLike] = None,
+) -> Any:
+    """Runs pipeline `steps` on `factor` by blocks, so temporary arrays fit into `memory_budget`.
+
+    Consecutive steps are grouped into stages by the way they treat a matrix:
+
+    * column-wise steps (:func:`pqr.look_back`, :func:`pqr.lag`, :func:`pqr.hold`) are run on
+      blocks of assets with full history;
+    * row-wise steps (:func:`pqr.quantiles`, :func:`pqr.buckets`, :func:`pqr.top`,
+      :func:`pqr.bottom`, :func:`pqr.allocate`, :func:`pqr.ew`, :func:`pqr.scale`,
+      :func:`pqr.limit`) are run on blocks of periods with all assets;
+    * element-wise steps (:func:`pqr.filter`, :func:`pqr.thresholds`) join any stage;
+    * other steps (e.g. :func:`pqr.evaluate`) are run on the whole output of the previous stage.
+
+    Blocks of a stage are as big as possible to keep temporaries of its steps within
+    `memory_budget`. Frozen matrix parameters (e.g. universe or weights) are aligned with every
+    block by the steps themselves. Output of every stage is written into one preallocated matrix,
+    which is memory-mapped in `out_dir` if it is given, so the whole pipeline can process matrices,
+    which don't fit into memory (e.g. opened by :func:`pqr.load`).
+
+    Parameters
+    ----------
+    steps : iterable of callable
+        Pipeline or any other sequence of steps, each of them takes one matrix.
+    factor : pd.DataFrame or Panel
+        Input of the first step.
+    memory_budget : int
+        Approximate limit of memory for temporaries of steps in bytes. Outputs of stages are not
+        included.
+    out_dir : str or os.PathLike, optional
+        Directory to store memory-mapped outputs of stages in. If None, outputs are kept in memory.
+
+    Returns
+    -------
+    Any
+        Output of the last step. Matrices are returned as pd.DataFrame, if `factor` is
+        pd.DataFrame, and as Panel otherwise.
+    """
+
+    is_frame = isinstance(factor, pd.DataFrame)
+    result = Panel.from_frame(factor) if is_frame else factor
+    for i, (kind, stage) in enumerate(_split_stages(_flatten_steps(steps))):
+        if kind is None or not isinstance(result, Panel):
+            for step in stage:
+                result = step(result)
+            continue
+
+        path = None if out_dir is None else tempfile.mkdtemp(prefix=f"stage_{i}_", dir=out_dir)
+        result = _run_stage(stage, result, axis=1 if kind == "columns" else 0,
+                            memory_budget=memory_budget, path=path)
+
+    if is_frame and isinstance(result, Panel):
+        return result.to_frame()
+    return result
+
+
+def _split_stages(
+        steps: Iterable[Callable],
+) -> list[tuple[Optional[Literal["columns", "rows"]], list[Callable]]]:
+    stages = []
+    for step in steps:
+        func = step.func if isinstance(step, freeze) else step
+        if func in _COLUMN_WISE and func in _ROW_WISE:
+            kind = "any"
+        elif func in _COLUMN_WISE:
+            kind = "columns"
+        elif func in _ROW_WISE:
+            kind = "rows"
+        else:
+            kind = None
+
+        last_kind = stages[-1][0] if stages else None
+        if kind is not None and last_kind is not None and "any" in (kind, last_kind):
+            stages[-1][0] = kind if last_kind == "any" else last_kind
+            stages[-1][1].append(step)
+        elif kind is not None and kind == last_kind:
+            stages[-1][1].append(step)
+        else:
+            stages.append([kind, [step]])
+    return [("rows" if kind == "any" else kind, stage) for kind, stage in stages]
+
+
+def _run_stage(
+        stage: list[Callable],
+        panel: Panel,
+        *,
+        axis: int,
+        memory_budget: int,
+        path: Optional[str],
+) -> Panel:
+    n_rows, n_cols = panel.shape
+    other_len = n_rows if axis == 1 else n_cols
+    itemsize = _float_dtype().itemsize
+    block_size = max(memory_budget // (max(other_len, 1) * itemsize * _N_TEMPORARIES), 1)
+
+    out, out_axes, filled = None, [], 0
+    for start in range(0, panel.shape[axis], block_size):
+        stop = start + block_size
+        if axis == 1:
+            block = Panel(panel.values[:, start:stop], index=panel.index,
+                          columns=panel.columns[start:stop])
+        else:
+            block = Panel(panel.values[start:stop], index=panel.index[start:stop],
+                          columns=panel.columns)
+        for step in stage:
+            block = step(block)
+        block_values = np.asarray(block)
+
+        if out is None:
+            shape = (len(block.index), n_cols) if axis == 1 else (n_rows, len(block.columns))
+            out = _empty(shape, block_values.dtype, path)
+            fixed_axis = block.index if axis == 1 else block.columns
+
+        length = block_values.shape[axis]
+        if axis == 1:
+            out[:, filled:filled + length] = block_values
+            out_axes.append(block.columns)
+        else:
+            out[filled:filled + length] = block_values
+            out_axes.append(block.index)
+        filled += length
+
+    if out is None:  # empty matrix
+        for step in stage:
+            panel = step(panel)
+        return panel
+
+    axis_index = out_axes[0].append(out_axes[1:]) if len(out_axes) > 1 else out_axes[0]
+    if axis == 1:
+        return Panel(out[:, :filled], index=fixed_axis, columns=axis_index)
+    return Panel(out[:filled], index=axis_index, columns=fixed_axis)
+
+
+def _empty(shape: tuple[int, int], dtype: np.dtype, path: Optional[str]) -> np.ndarray:
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    return create(
+        path,
+        index=pd.RangeIndex(shape[0]),
+        columns=pd.RangeIndex(shape[1]),
+        dtype=dtype,
+    ).values
+
@@ -0,0 +1,75 @@
+"""Global options of computations."""
+
+from __future__ import annotations
+
+__all__ = [
+    "config",
+    "get_config",
+]
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+_options: Dict[str, Any] = {
+    "dtype": np.dtype(np.float64),
+}
+
+
+def config(*, dtype: Optional[np.dtype | type | str] = None) -> _RestoreOptions:
+    """Sets global options of computations.
+
+    Options are set immediately and stay set, but if the result is used as a context manager,
+    previous options are restored on exit from the context:
+
+    >>> pqr.config(dtype=np.float32)  # for the rest of the session
+    >>> with pqr.config(dtype=np.float32):  # only inside the block
+    ...     holdings = strategy(prices)
+
+    Parameters
+    ----------
+    dtype : np.dtype, optional
+        Float dtype of values, produced by steps. By default float64, float32 halves memory usage
+        of factor values and holdings. Accumulations (normalization in :func:`pqr.allocate`,
+        leverage in :func:`pqr.limit`, portfolio returns in :func:`pqr.evaluate`) and
+        :func:`pqr.to_returns` are always computed in float64 to preserve accuracy. If None, the
+        option is not changed.
+
+    Returns
+    -------
+    context manager
+        Context manager, which restores previous options on exit.
+    """
+
+    restore = _RestoreOptions(dict(_options))
+    if dtype is not None:
+        dtype = np.dtype(dtype)
+        if dtype.kind != "f":
+            raise ValueError(f"dtype must be a float dtype, got {dtype}")
+        _options["dtype"] = dtype
+    return restore
+
+
+def get_config() -> Dict[str, Any]:
+    """Returns current global options of computations."""
+
+    return dict(_options)
+
+
+class _RestoreOptions:
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _options.clear()
+        _options.update(self.options)
+
+    def __repr__(self) -> str:
+        return f"config({', '.join(f'{k}={v!r}' for k, v in _options.items())})"
+
+
+def _float_dtype() -> np.dtype:
+    return _options["dtype"]
@@ -4,12 +4,16 @@ from __future__ import annotations
 
 __all__ = [
     "evaluate",
+    "evaluate_many",
     "to_returns",
 ]
 
+from typing import Hashable, Mapping
+
 import numpy as np
 import pandas as pd
 
+from pqr.panel import _like
 from pqr.utils import align
 
 
@@ -30,15 +34,75 @@ def evaluate(
     Returns
     -------
     pd.Series
-        Periodic returns of a portfolio.
+        Periodic returns of a portfolio, always accumulated in float64.
     """
 
     holdings, universe_returns = align(holdings, universe_returns)
     returns = np.zeros(len(holdings))
-    returns[1:] = (np.asarray(holdings)[:-1] * np.asarray(universe_returns)[1:]).sum(axis=1)
+    returns[1:] = np.multiply(
+        np.asarray(holdings)[:-1],
+        np.asarray(universe_returns)[1:],
+        dtype=np.float64,
+    ).sum(axis=1)
     return pd.Series(returns, index=holdings.index.copy())
 
 
+def evaluate_many(
+        holdings: Mapping[Hashable, pd.DataFrame] | np.ndarray,
+        *,
+        universe_returns: pd.DataFrame,
+) -> pd.DataFrame:
+    """Calculates returns of many portfolios at once.
+
+    All holdings are aligned with `universe_returns` only once and returns are computed by
+    contraction of holdings with universe returns without building temporary matrices of their
+    products, which is faster than calling :func:`evaluate` for every portfolio. 3d array of
+    holdings is contracted at once.
+
+    Parameters
+    ----------
+    holdings : mapping of pd.DataFrame or np.ndarray
+        Weights of portfolios: either mapping from name of a portfolio to its holdings or 3d array
+        of shape (n_portfolios, n_periods, n_assets), which is already aligned with
+        `universe_returns`.
+    universe_returns : pd.DataFrame
+        Returns of universe, available to trade for strategies.
+
+    Returns
+    -------
+    pd.DataFrame
+        Periodic returns of portfolios, one column for each portfolio.
+    """
+
+    if isinstance(holdings, np.ndarray):
+        if holdings.shape[1:] != universe_returns.shape:
+            raise ValueError(
+                f"holdings of shape {holdings.shape[1:]} are not aligned with universe returns of "
+                f"shape {universe_returns.shape}"
+            )
+        names, holdings_arrs = range(len(holdings)), holdings
+    else:
+        names = list(holdings)
+        *holdings_arrs, universe_returns = align(*holdings.values(), universe_returns)
+
+    universe_returns_arr = np.asarray(universe_returns, dtype=float)[1:]
+    returns = np.zeros((len(universe_returns), len(names)))
+    if isinstance(holdings_arrs, np.ndarray):
+        returns[1:] = np.einsum("ktn,tn->tk", holdings_arrs[:, :-1], universe_returns_arr)
+    else:  # do not stack separate matrices to avoid copying them
+        for i, holdings_arr in enumerate(holdings_arrs):
+            returns[1:, i] = np.einsum(
+                "tn,tn->t",
+                np.asarray(holdings_arr, dtype=float)[:-1],
+                universe_returns_arr,
+            )
+    return pd.DataFrame(
+        returns,
+        index=universe_returns.index.copy(),
+        columns=names,
+    )
+
+
 def to_returns(prices: pd.DataFrame) -> pd.DataFrame:
     """Calculates universe returns from given prices of assets universe.
 
@@ -53,15 +117,14 @@ def to_returns(prices: pd.DataFrame) -> pd.DataFrame:
     Returns
     -------
     pd.DataFrame
-        Returns of assets universe.
+        Returns of assets universe in float64, whatever dtype is set by :func:`pqr.config`.
     """
 
     prices_arr = np.asarray(prices)
     universe_returns = np.zeros_like(prices_arr, dtype=float)
     universe_returns[1:] = np.diff(prices_arr, axis=0) / prices_arr[:-1]
     universe_returns = np.nan_to_num(universe_returns, nan=0, neginf=0, posinf=0)
-    return pd.DataFrame(
+    return _like(
+        prices,
         universe_returns,
-        index=prices.index.copy(),
-        columns=prices.columns.copy(),
     )
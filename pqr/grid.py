@@ -0,0 +1,149 @@
+"""Parallel backtesting of strategies over grids of parameters."""
+
+from __future__ import annotations
+
+__all__ = [
+    "grid_search",
+]
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pqr.config import config, get_config
+from pqr.evaluation import to_returns
+
+
+def grid_search(
+        prices: pd.DataFrame,
+        *,
+        factory: Callable[..., Callable[[pd.DataFrame], pd.Series]],
+        grid: Mapping[str, Sequence[Any]],
+        n_workers: Optional[int] = None,
+        chunksize: int = 1,
+) -> pd.DataFrame:
+    """Backtests strategy with every combination of parameters from `grid` in a process pool.
+
+    `prices` and universe returns are put into shared memory only once, so workers read them
+    without copying, and only parameters and resulting returns are sent between processes. For
+    every combination of parameters `factory` is called in a worker as
+    ``factory(prices, universe_returns, **params)`` and returned strategy (e.g. pipeline, made by
+    :func:`pqr.compose`) is applied on `prices` to get periodic returns of a portfolio. Matrices,
+    passed to `factory`, are read-only.
+
+    Combinations are ordered as by :func:`itertools.product` over values of `grid`, so results
+    don't depend on the number of workers and scheduling of tasks.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        Matrix with **close** prices of traded assets.
+    factory : callable
+        Function, which creates strategy from prices, universe returns and parameters. Must be
+        picklable (e.g. defined at the top level of a module) to be sent to workers.
+    grid : mapping of str to sequence
+        Mapping from name of a parameter to its values.
+    n_workers : int, optional
+        Number of worker processes. If None, the number of CPUs is used. If 1, all strategies are
+        backtested in the current process.
+    chunksize : int, default=1
+        Number of combinations, sent to a worker at once. Bigger chunks reduce overhead of
+        communication for fast strategies.
+
+    Returns
+    -------
+    pd.DataFrame
+        Periodic returns of strategies, one column for each combination of parameters. Columns are
+        multiindex with levels named by parameters. Returns are aligned by the union of their
+        indices, periods before the start of a strategy are filled with nans.
+    """
+
+    names = list(grid)
+    combinations = list(itertools.product(*grid.values()))
+    params = [dict(zip(names, combination)) for combination in combinations]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    prices_arr = np.asarray(prices, dtype=float)
+    universe_returns_arr = np.asarray(to_returns(prices), dtype=float)
+
+    if n_workers == 1 or len(params) <= 1:
+        _init_worker(factory, prices.index, prices.columns, prices_arr, universe_returns_arr,
+                     get_config())
+        try:
+            returns = [_run_strategy(p) for p in params]
+        finally:
+            _worker_state.clear()
+    else:
+        memories = [_share(prices_arr), _share(universe_returns_arr)]
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        factory,
+                        prices.index,
+                        prices.columns,
+                        *((memory.name, prices_arr.shape) for memory in memories),
+                        get_config(),  # options of the parent process are not inherited on spawn
+                    ),
+            ) as executor:
+                returns = list(executor.map(_run_strategy, params, chunksize=chunksize))
+        finally:
+            for memory in memories:
+                memory.close()
+                memory.unlink()
+
+    returns = pd.concat(returns, axis=1)
+    returns.columns = pd.MultiIndex.from_tuples(combinations, names=names)
+    return returns
+
+
+_worker_state: Dict[str, Any] = {}
+
+
+def _share(arr: np.ndarray) -> SharedMemory:
+    memory = SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=float, buffer=memory.buf)[:] = arr
+    return memory
+
+
+def _attach(shared: tuple[str, tuple[int, int]] | np.ndarray) -> np.ndarray:
+    if isinstance(shared, np.ndarray):
+        arr = shared.view()
+    else:
+        name, shape = shared
+        memory = SharedMemory(name=name)
+        _worker_state.setdefault("memories", []).append(memory)  # buffer must outlive arrays
+        arr = np.ndarray(shape, dtype=float, buffer=memory.buf)
+    arr.flags.writeable = False
+    return arr
+
+
+def _init_worker(
+        factory: Callable[..., Callable[[pd.DataFrame], pd.Series]],
+        index: pd.Index,
+        columns: pd.Index,
+        prices: tuple[str, tuple[int, int]] | np.ndarray,
+        universe_returns: tuple[str, tuple[int, int]] | np.ndarray,
+        options: Dict[str, Any],
+) -> None:
+    config(**options)
+    _worker_state["factory"] = factory
+    _worker_state["prices"] = pd.DataFrame(_attach(prices), index=index, columns=columns)
+    _worker_state["universe_returns"] = pd.DataFrame(
+        _attach(universe_returns),
+        index=index,
+        columns=columns,
+    )
+
+
+def _run_strategy(params: Dict[str, Any]) -> pd.Series:
+    prices = _worker_state["prices"]
+    strategy = _worker_state["factory"](prices, _worker_state["universe_returns"], **params)
+    return strategy(prices)
@@ -0,0 +1,333 @@
+"""Incremental versions of operations for data, which is appended row by row."""
+
+from __future__ import annotations
+
+__all__ = [
+    "IncrementalLookBack",
+    "IncrementalBacktest",
+    "BacktestUpdate",
+]
+
+from typing import Any, Callable, Iterable, Literal, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from pqr.evaluation import evaluate
+from pqr.picking import look_back, lag, hold
+from pqr.utils import freeze, _flatten_steps
+
+
+class IncrementalLookBack:
+    """Incremental version of :func:`pqr.look_back`.
+
+    Keeps rolling state of the last `period` rows, so a new row of factor values is calculated in
+    time, proportional to the number of assets and independent of the length of history:
+
+    * "pct" - ring buffer of the last `period` rows;
+    * "mean" - running sums over the ring buffer, which are re-summed once in `period` rows to
+      prevent accumulation of rounding errors;
+    * "min" and "max" - running extremum of the current block of `period` rows and suffix extrema
+      of the previous block (two-stacks queue), which are rebuilt once in `period` rows;
+    * "median" - selection in the ring buffer, O(`period`) for every asset.
+
+    Results are the same as of :func:`pqr.look_back` (for "mean" up to rounding errors). Assets
+    are fixed by the first row, new assets in next rows are ignored.
+
+    Parameters
+    ----------
+    period : int
+        Period to look back on the data.
+    agg : {"pct", "mean", "median", "min", "max"}
+        Aggregation func to apply on factor values.
+    """
+
+    def __init__(
+            self,
+            *,
+            period: int,
+            agg: Literal["pct", "mean", "median", "min", "max"],
+    ) -> None:
+        if agg not in ("pct", "mean", "median", "min", "max"):
+            raise ValueError(
+                f"agg must be one of 'pct', 'mean', 'median', 'min', 'max', got {agg!r}"
+            )
+
+        self.period = period
+        self.agg = agg
+        self.columns = None
+        self._n_rows = 0
+
+    def update(self, row: pd.Series) -> Optional[pd.Series]:
+        """Appends new row of data and calculates factor values for it.
+
+        Parameters
+        ----------
+        row : pd.Series
+            New row of data, named by its timestamp.
+
+        Returns
+        -------
+        pd.Series or None
+            Aggregated factor values for the new row or None, if less than `period` rows were
+            appended before it (the same rows are dropped by :func:`pqr.look_back`).
+        """
+
+        if self.columns is None:
+            self._init_state(row.index)
+
+        factor = self._push(np.asarray(row.reindex(self.columns), dtype=float))
+        if self._n_rows <= self.period:
+            return None
+        return pd.Series(factor, index=self.columns, name=row.name)
+
+    def warm_up(self, history: pd.DataFrame) -> None:
+        """Initializes state by `history` of data without calculating factor values.
+
+        Only the last `period` rows of `history` are actually processed.
+
+        Parameters
+        ----------
+        history : pd.DataFrame
+            Matrix with already known data.
+        """
+
+        self._init_state(history.columns)
+        tail = np.asarray(history, dtype=float)[-self.period:]
+        self._n_rows = len(history) - len(tail)
+        for values in tail:
+            self._push(values)
+        if self.agg == "mean":
+            self._resum()
+
+    def _init_state(self, columns: pd.Index) -> None:
+        self.columns = columns
+        self._n_rows = 0
+        self._buffer = np.full((self.period, len(columns)), np.nan)
+
+        if self.agg == "mean":
+            self._sum = np.zeros(len(columns))
+            self._n_nans = np.zeros(len(columns), dtype=int)
+        elif self.agg in ("min", "max"):
+            self._ufunc = np.minimum if self.agg == "min" else np.maximum
+            identity = np.inf if self.agg == "min" else -np.inf
+            self._block_extremum = np.full(len(columns), identity)
+            # suffix extrema of the previous block, the last row is identity for empty suffix
+            self._suffix_extrema = np.full((self.period + 1, len(columns)), identity)
+
+    def _push(self, values: np.ndarray) -> np.ndarray:
+        pos = self._n_rows % self.period
+        old_values = self._buffer[pos].copy()
+        self._buffer[pos] = values
+        self._n_rows += 1
+
+        if self.agg == "pct":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (values - old_values) / old_values
+
+        elif self.agg == "mean":
+            is_nan, old_is_nan = np.isnan(values), np.isnan(old_values)
+            self._sum += np.where(is_nan, 0, values) - np.where(old_is_nan, 0, old_values)
+            self._n_nans += is_nan.astype(int) - old_is_nan
+            if pos == self.period - 1:
+                self._resum()
+            return np.where(self._n_nans == 0, self._sum / self.period, np.nan)
+
+        elif self.agg in ("min", "max"):
+            self._block_extremum = self._ufunc(self._block_extremum, values)
+            factor = self._ufunc(self._block_extremum, self._suffix_extrema[pos + 1])
+            if pos == self.period - 1:  # the block is full, it becomes the previous one
+                self._suffix_extrema[:-1] = self._ufunc.accumulate(self._buffer[::-1])[::-1]
+                self._block_extremum = self._suffix_extrema[-1].copy()
+            return factor
+
+        else:  # median
+            return np.median(self._buffer, axis=0)
+
+    def _resum(self) -> None:
+        is_nan = np.isnan(self._buffer)
+        self._sum = np.where(is_nan, 0, self._buffer).sum(axis=0)
+        self._n_nans = is_nan.sum(axis=0)
+
+
+class BacktestUpdate(NamedTuple):
+    """Result of appending a new row to :class:`IncrementalBacktest`."""
+
+    holdings: pd.Series
+    returns: float
+
+
+class IncrementalBacktest:
+    """Incremental backtest of a strategy, which is updated by a new row of prices.
+
+    Steps of the strategy are the same as for :func:`pqr.compose`, but every step keeps its state
+    instead of recomputing the whole history:
+
+    * :func:`pqr.look_back` is replaced by :class:`IncrementalLookBack`;
+    * :func:`pqr.lag` keeps the last `period` rows;
+    * :func:`pqr.hold` keeps the number of processed rows and the held row;
+    * all other steps (e.g. :func:`pqr.filter`, :func:`pqr.quantiles`, :func:`pqr.ew`) must work
+      row by row, they are called on 1-row dataframes;
+    * :func:`pqr.evaluate` as the last step is optional, portfolio returns are calculated from
+      the previous holdings and returns of the universe, estimated from prices as in
+      :func:`pqr.to_returns`.
+
+    So a new row is processed in time, proportional to the number of assets and independent of the
+    length of history. Holdings and returns are the same as the last rows of the full backtest
+    (for "mean" look back up to rounding errors).
+
+    Parameters
+    ----------
+    steps : iterable of callable
+        Pipeline or any other sequence of steps, which transforms prices into holdings.
+    """
+
+    def __init__(self, steps: Iterable[Callable]) -> None:
+        steps = list(_flatten_steps(steps))
+        if steps and _func(steps[-1]) is evaluate:
+            steps = steps[:-1]
+        self.steps = [_incremental_step(step) for step in steps]
+        self._last_prices = None
+        self._last_holdings = None
+
+    def update(self, row: pd.Series, **rows: Any) -> Optional[BacktestUpdate]:
+        """Appends new row of prices and calculates holdings and realized return for it.
+
+        Parameters
+        ----------
+        row : pd.Series
+            New row of prices, named by its timestamp.
+        rows
+            New rows of matrices, frozen as parameters of steps, by names of parameters (e.g.
+            universe=...). Matrices, given on freezing, are used for parameters without new rows,
+            so they must already contain the timestamp of `row`.
+
+        Returns
+        -------
+        BacktestUpdate or None
+            Holdings for the new row and return of the portfolio, realized in its period, or None
+            if there is not enough history to calculate holdings yet.
+        """
+
+        universe_returns = self._universe_returns(row)
+
+        result = pd.DataFrame(row.to_numpy()[np.newaxis], index=[row.name], columns=row.index)
+        for step in self.steps:
+            result = step.update(result, rows)
+            if result is None:
+                return None
+        holdings = result.iloc[0]
+
+        realized = 0.0
+        if self._last_holdings is not None:
+            previous = self._last_holdings.reindex(holdings.index)
+            realized = float(np.sum(previous.to_numpy() * universe_returns.reindex(holdings.index)))
+        self._last_holdings = holdings
+        return BacktestUpdate(holdings, realized)
+
+    def warm_up(self, history: pd.DataFrame, **histories: pd.DataFrame | pd.Series) -> None:
+        """Initializes state by `history` of prices, feeding it row by row.
+
+        Parameters
+        ----------
+        history : pd.DataFrame
+            Matrix with already known prices.
+        histories
+            Matrices, frozen as parameters of steps, for the same periods.
+        """
+
+        for timestamp, row in history.iterrows():
+            self.update(row, **{
+                name: matrix.loc[timestamp]
+                for name, matrix in histories.items()
+            })
+
+    def _universe_returns(self, row: pd.Series) -> pd.Series:
+        prices = row.to_numpy(dtype=float)
+        if self._last_prices is None:
+            returns = np.zeros_like(prices)
+        else:
+            last_prices = self._last_prices.reindex(row.index).to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = (prices - last_prices) / last_prices
+            returns = np.nan_to_num(returns, nan=0, neginf=0, posinf=0)
+        self._last_prices = row
+        return pd.Series(returns, index=row.index)
+
+
+class _LookBackStep:
+    def __init__(self, period: int, agg: str) -> None:
+        self.look_back = IncrementalLookBack(period=period, agg=agg)
+
+    def update(self, frame: pd.DataFrame, rows: dict[str, Any]) -> Optional[pd.DataFrame]:
+        factor = self.look_back.update(frame.iloc[0])
+        if factor is None:
+            return None
+        return pd.DataFrame(factor.to_numpy()[np.newaxis], index=frame.index, columns=factor.index)
+
+
+class _LagStep:
+    def __init__(self, period: int) -> None:
+        if period < 0:
+            raise ValueError("lag with negative period needs future values")
+        self.period = period
+        self.buffer = []
+
+    def update(self, frame: pd.DataFrame, rows: dict[str, Any]) -> Optional[pd.DataFrame]:
+        if self.period == 0:
+            return frame
+
+        self.buffer.append(frame)
+        if len(self.buffer) <= self.period:
+            return None
+        lagged = self.buffer.pop(0)
+        return pd.DataFrame(lagged.to_numpy(), index=frame.index, columns=lagged.columns)
+
+
+class _HoldStep:
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.n_rows = 0
+        self.held = None
+
+    def update(self, frame: pd.DataFrame, rows: dict[str, Any]) -> Optional[pd.DataFrame]:
+        if self.n_rows % self.period == 0:
+            self.held = frame
+        self.n_rows += 1
+        return pd.DataFrame(self.held.to_numpy(), index=frame.index, columns=self.held.columns)
+
+
+class _RowWiseStep:
+    def __init__(self, step: Callable) -> None:
+        self.step = step
+
+    def update(self, frame: pd.DataFrame, rows: dict[str, Any]) -> Optional[pd.DataFrame]:
+        if not isinstance(self.step, freeze) or not rows.keys() & self.step.keywords.keys():
+            return self.step(frame)
+
+        keywords = dict(self.step.keywords)
+        for name in rows.keys() & keywords.keys():
+            keywords[name] = _as_row(rows[name], frame.index)
+        return self.step.func(frame, *self.step.args, **keywords)
+
+
+def _incremental_step(step: Callable) -> Any:
+    func = _func(step)
+    params = step.keywords if isinstance(step, freeze) else {}
+    if func is look_back:
+        return _LookBackStep(params["period"], params["agg"])
+    elif func is lag:
+        return _LagStep(params["period"])
+    elif func is hold:
+        return _HoldStep(params["period"])
+    return _RowWiseStep(step)
+
+
+def _as_row(value: Any, index: pd.Index) -> pd.DataFrame | pd.Series:
+    if isinstance(value, pd.Series):  # row of a matrix
+        return pd.DataFrame(value.to_numpy()[np.newaxis], index=index, columns=value.index)
+    return pd.Series([value], index=index)  # value of a series for the period
+
+
+def _func(step: Callable) -> Callable:
+    return step.func if isinstance(step, freeze) else step
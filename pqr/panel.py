@@ -0,0 +1,336 @@
+"""Lightweight container of matrices, which can be passed between steps instead of dataframes."""
+
+from __future__ import annotations
+
+__all__ = [
+    "Panel",
+    "PackedSignals",
+]
+
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class Panel:
+    """Matrix of values with index and columns, backed by np.ndarray.
+
+    Unlike pd.DataFrame, panel is created without any checks or conversions of its values and
+    shares its index and columns (pandas indexes are immutable) with other panels, so passing
+    panels between steps of a pipeline saves construction of dataframes and copying of indexes on
+    every step. All built-in steps accept panels and return panels, if their input is a panel.
+
+    Panel behaves like a matrix: has shape, index and columns and can be converted to np.ndarray,
+    so it can be passed to functions, which read their input with np.asarray.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2d array of values.
+    index : pd.Index
+        Index of rows.
+    columns : pd.Index
+        Columns of the matrix.
+    """
+
+    def __init__(
+            self,
+            values: np.ndarray,
+            *,
+            index: pd.Index,
+            columns: pd.Index,
+    ) -> None:
+        values = np.asanyarray(values)  # keeps np.memmap
+        if values.shape != (len(index), len(columns)):
+            raise ValueError(
+                f"values of shape {values.shape} do not match index and columns of shape "
+                f"{(len(index), len(columns))}"
+            )
+
+        self.values = values
+        self.index = index
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> Panel:
+        """Creates panel from pd.DataFrame without copying its values, if they have one dtype."""
+
+        return cls(frame.to_numpy(), index=frame.index, columns=frame.columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Converts panel to pd.DataFrame without copying its values."""
+
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __array__(self, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        return np.asarray(self.values, dtype=dtype)
+
+    def __repr__(self) -> str:
+        return f"Panel(shape={self.shape}, dtype={self.dtype})"
+
+    def copy(self) -> Panel:
+        """Returns panel with copied values and shared index and columns."""
+
+        return Panel(self.values.copy(), index=self.index, columns=self.columns)
+
+    def reindex(
+            self,
+            index: Optional[pd.Index] = None,
+            columns: Optional[pd.Index] = None,
+    ) -> Panel:
+        """Conforms panel to new index and columns.
+
+        Missing values are filled with nans, dtype of values is promoted to float if needed.
+
+        Parameters
+        ----------
+        index : pd.Index, optional
+            New index. If None, index is not changed.
+        columns : pd.Index, optional
+            New columns. If None, columns are not changed.
+
+        Returns
+        -------
+        Panel
+            Reindexed panel.
+        """
+
+        values = self.values
+        if index is not None:
+            values = _take(values, self.index.get_indexer(index), axis=0)
+        else:
+            index = self.index
+        if columns is not None:
+            values = _take(values, self.columns.get_indexer(columns), axis=1)
+        else:
+            columns = self.columns
+        return Panel(values, index=index, columns=columns)
+
+
+class PackedSignals:
+    """Matrix of True/False signals, packed into bits.
+
+    Every row is packed by np.packbits into bytes, 8 signals per byte, so packed signals take 8
+    times less memory than bool matrices, which is useful to keep many of them (e.g. in a grid
+    search). Signals can be combined by ``&``, ``|``, ``^`` and ``~`` without unpacking, number of
+    picked assets in every row is counted by :meth:`count` on packed bytes.
+
+    Read-only matrix like :class:`Panel`, which is unpacked to bool np.ndarray on conversion.
+    :func:`pqr.allocate` and :func:`pqr.ew` accept packed signals directly.
+
+    Parameters
+    ----------
+    bits : np.ndarray
+        2d array of uint8 of shape (n_rows, ceil(n_cols / 8)) with signals, packed by rows.
+        Padding bits of the last byte of a row must be zeros.
+    index : pd.Index
+        Index of rows.
+    columns : pd.Index
+        Columns of the matrix.
+    """
+
+    def __init__(
+            self,
+            bits: np.ndarray,
+            *,
+            index: pd.Index,
+            columns: pd.Index,
+    ) -> None:
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.shape != (len(index), -(-len(columns) // 8)):
+            raise ValueError(
+                f"bits of shape {bits.shape} do not match index and columns of shape "
+                f"{(len(index), len(columns))}"
+            )
+
+        self.bits = bits
+        self.index = index
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, signals: pd.DataFrame | Panel) -> PackedSignals:
+        """Packs pd.DataFrame or :class:`Panel` with True/False signals."""
+
+        return cls(
+            np.packbits(np.asarray(signals, dtype=bool), axis=1),
+            index=signals.index,
+            columns=signals.columns,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Unpacks signals to pd.DataFrame."""
+
+        return pd.DataFrame(np.asarray(self), index=self.index, columns=self.columns, copy=False)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.index), len(self.columns)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __array__(self, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        unpacked = np.unpackbits(self.bits, axis=1, count=len(self.columns)).view(bool)
+        return np.asarray(unpacked, dtype=dtype)
+
+    def __repr__(self) -> str:
+        return f"PackedSignals(shape={self.shape})"
+
+    def copy(self) -> PackedSignals:
+        """Returns packed signals with copied bits and shared index and columns."""
+
+        return PackedSignals(self.bits.copy(), index=self.index, columns=self.columns)
+
+    def count(self) -> pd.Series:
+        """Counts picked assets (True signals) in every row.
+
+        Returns
+        -------
+        pd.Series
+            Number of True signals in every row.
+        """
+
+        if _bitwise_count is not None:
+            counts = _bitwise_count(self.bits).sum(axis=1, dtype=np.int64)
+        else:
+            counts = _POPCOUNT[self.bits].sum(axis=1, dtype=np.int64)
+        return pd.Series(counts, index=self.index.copy())
+
+    def __and__(self, other: PackedSignals) -> PackedSignals:
+        return self._combine(other, np.bitwise_and)
+
+    def __or__(self, other: PackedSignals) -> PackedSignals:
+        return self._combine(other, np.bitwise_or)
+
+    def __xor__(self, other: PackedSignals) -> PackedSignals:
+        return self._combine(other, np.bitwise_xor)
+
+    def __invert__(self) -> PackedSignals:
+        inverted = np.invert(self.bits)
+        n_tail = len(self.columns) % 8
+        if n_tail:  # padding bits must stay zeros
+            inverted[:, -1] &= np.uint8(0xFF << (8 - n_tail) & 0xFF)
+        return PackedSignals(inverted, index=self.index, columns=self.columns)
+
+    def reindex(
+            self,
+            index: Optional[pd.Index] = None,
+            columns: Optional[pd.Index] = None,
+    ) -> PackedSignals:
+        """Conforms packed signals to new index and columns.
+
+        Missing signals are filled with False.
+
+        Parameters
+        ----------
+        index : pd.Index, optional
+            New index. If None, index is not changed.
+        columns : pd.Index, optional
+            New columns. If None, columns are not changed.
+
+        Returns
+        -------
+        PackedSignals
+            Reindexed packed signals.
+        """
+
+        bits = self.bits
+        if index is not None:
+            indexer = self.index.get_indexer(index)
+            bits = bits.take(indexer, axis=0, mode="clip")
+            bits[indexer == -1] = 0
+        else:
+            index = self.index
+        if columns is not None:
+            indexer = self.columns.get_indexer(columns)
+            unpacked = np.unpackbits(bits, axis=1, count=len(self.columns)).view(bool)
+            unpacked = unpacked.take(indexer, axis=1, mode="clip")
+            unpacked[:, indexer == -1] = False
+            bits = np.packbits(unpacked, axis=1)
+        else:
+            columns = self.columns
+        return PackedSignals(bits, index=index, columns=columns)
+
+    def _combine(self, other: PackedSignals, op: np.ufunc) -> PackedSignals:
+        if not isinstance(other, PackedSignals):
+            return NotImplemented
+        if not (self.index.equals(other.index) and self.columns.equals(other.columns)):
+            raise ValueError("packed signals must have the same index and columns")
+        return PackedSignals(op(self.bits, other.bits), index=self.index, columns=self.columns)
+
+
+def _like(
+        template: pd.DataFrame | Panel,
+        values: np.ndarray,
+        *,
+        index: Optional[pd.Index] = None,
+        columns: Optional[pd.Index] = None,
+) -> pd.DataFrame | Panel:
+    """Wraps `values` into the same container as `template`.
+
+    Index and columns default to the ones of `template`. Panel shares them, while pd.DataFrame
+    gets their copies.
+    """
+
+    if index is None:
+        index = template.index
+    if columns is None:
+        columns = template.columns
+
+    if isinstance(template, Panel):
+        return Panel(values, index=index, columns=columns)
+    return pd.DataFrame(values, index=index.copy(), columns=columns.copy())
+
+
+_bitwise_count = getattr(np, "bitwise_count", None)  # numpy >= 2.0
+
+# number of set bits in every possible byte
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(
+    axis=1,
+    dtype=np.uint8,
+)
+
+
+def _take(values: np.ndarray, indexer: np.ndarray, axis: int) -> np.ndarray:
+    missing = indexer == -1
+    if not missing.any():
+        return values.take(indexer, axis=axis)
+
+    taken = values.astype(np.result_type(values.dtype, np.float64)).take(indexer, axis=axis)
+    if axis == 0:
+        taken[missing] = np.nan
+    else:
+        taken[:, missing] = np.nan
+    return taken
+
+
+def _to_panel(value: Any) -> Any:
+    return Panel.from_frame(value) if isinstance(value, pd.DataFrame) else value
+
+
+def _from_panel(value: Any) -> Any:
+    if isinstance(value, Panel):
+        return value.to_frame()
+    elif isinstance(value, dict):
+        return {key: _from_panel(item) for key, item in value.items()}
+    return value
@@ -5,19 +5,33 @@ from __future__ import annotations
 __all__ = [
     "filter",
     "look_back",
+    "look_back_many",
     "lag",
+    "lag_many",
+    "Lagged",
     "hold",
+    "hold_phases",
+    "Held",
     "quantiles",
+    "buckets",
     "top",
     "bottom",
     "thresholds",
 ]
 
-from typing import Literal, Callable
+from typing import Literal, Callable, Iterator, Mapping, Optional, Sequence, Dict
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
 
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+from pqr.config import _float_dtype
+from pqr.panel import Panel, _like, _take
 from pqr.utils import align
 
 
@@ -44,10 +58,9 @@ def filter(
     """
 
     universe, factor = align(universe, factor)
-    return pd.DataFrame(
-        np.where(np.asarray(universe, dtype=bool), np.asarray(factor, float), np.nan),
-        index=factor.index.copy(),
-        columns=factor.columns.copy(),
+    return _like(
+        factor,
+        np.where(np.asarray(universe, dtype=bool), np.asarray(factor, _float_dtype()), np.nan),
     )
 
 
@@ -55,12 +68,20 @@ def look_back(
         factor: pd.DataFrame,
         *,
         period: int,
-        agg: Literal["pct", "mean", "median", "min", "max"] | Callable[[pd.Series], float],
+        agg: Literal["pct", "mean", "median", "min", "max", "std", "var", "sum", "skew", "zscore"]
+             | Callable[[pd.Series], float]
+             | Callable[[np.ndarray], np.ndarray],
+        vectorized: bool = False,
 ) -> pd.DataFrame:
     """Aggregates `factor` values column-wise each `period` by `agg`.
 
-    If agg is not predefined can work very slow. In this case the best decision is to write your
-    own effective realisation of transformation function.
+    If agg is not predefined and not vectorized can work very slow. In this case the best decision
+    is to write vectorized version of it or your own effective realisation of transformation
+    function.
+
+    Standard deviation, variance and skewness are unbiased, z-score is deviation of the last
+    value from the mean in standard deviations. Median is much faster if optional dependency
+    bottleneck is installed.
 
     Parameters
     ----------
@@ -68,9 +89,14 @@ def look_back(
         Matrix with factor values.
     period : int
         Period to look back on the data.
-    agg : {"pct", "mean", "median", "min", "max"} or callable
+    agg : {"pct", "mean", "median", "min", "max", "std", "var", "sum", "skew", "zscore"} or callable
         Aggregation func to apply on `factor` values. If callable is given function must be
-        appliable on pd.Series and return float.
+        appliable on pd.Series and return float. If callable is vectorized, it must be appliable
+        on np.ndarray of windows with shape (n_windows, `period`, n_assets) and reduce it along
+        the 1st axis to shape (n_windows, n_assets).
+    vectorized : bool, default=False
+        Whether callable `agg` is vectorized. Windows are read-only views of `factor` values,
+        which are passed to `agg` by blocks to keep memory usage low.
 
     Returns
     -------
@@ -78,25 +104,122 @@ def look_back(
         Aggregated `factor` values.
     """
 
+    if isinstance(factor, Panel) and agg not in ("pct", "median") and not vectorized:
+        # rolling aggregations of pandas are reused for panels
+        return Panel.from_frame(look_back(factor.to_frame(), period=period, agg=agg))
+
     if agg == "pct":
-        factor_arr = np.asarray(factor)
+        factor_arr = np.asarray(factor, dtype=_float_dtype())
         abs_change = (factor_arr[period:] - factor_arr[:-period])
         base = factor_arr[:-period]
-        return pd.DataFrame(
+        return _like(
+            factor,
             abs_change / base,
-            index=factor.index[period:].copy(),
-            columns=factor.columns.copy(),
+            index=factor.index[period:],
         )
     elif agg == "mean":
-        return factor.rolling(period, axis=0).mean().iloc[period:]
+        aggregated = factor.rolling(period, axis=0).mean()
     elif agg == "median":
-        return factor.rolling(period, axis=0).median().iloc[period:]
+        return _like(
+            factor,
+            _rolling_median(np.asarray(factor, dtype=_float_dtype()), period),
+            index=factor.index[period:],
+        )
     elif agg == "min":
-        return factor.rolling(period, axis=0).min().iloc[period:]
+        aggregated = factor.rolling(period, axis=0).min()
     elif agg == "max":
-        return factor.rolling(period, axis=0).max().iloc[period:]
+        aggregated = factor.rolling(period, axis=0).max()
+    elif agg == "std":
+        aggregated = factor.rolling(period, axis=0).std()
+    elif agg == "var":
+        aggregated = factor.rolling(period, axis=0).var()
+    elif agg == "sum":
+        aggregated = factor.rolling(period, axis=0).sum()
+    elif agg == "skew":
+        aggregated = factor.rolling(period, axis=0).skew()
+    elif agg == "zscore":
+        rolling = factor.rolling(period, axis=0)
+        aggregated = (factor - rolling.mean()) / rolling.std()
+    elif vectorized:
+        return _like(
+            factor,
+            _rolling_apply(np.asarray(factor, dtype=_float_dtype()), period, agg),
+            index=factor.index[period:],
+        )
     else:
-        return factor.rolling(period, axis=0).apply(agg).iloc[period:]
+        aggregated = factor.rolling(period, axis=0).apply(agg)
+
+    # rolling aggregations of pandas are always computed in float64
+    return aggregated.iloc[period:].astype(_float_dtype(), copy=False)
+
+
+def look_back_many(
+        factor: pd.DataFrame,
+        *,
+        periods: Sequence[int],
+        agg: Literal["pct", "mean", "median", "min", "max"] | Callable[[pd.Series], float],
+) -> Dict[int, pd.DataFrame]:
+    """Aggregates `factor` values column-wise for each of `periods` by `agg`.
+
+    For "pct" and "mean" all periods are computed from the same data in one pass: percentage
+    changes are taken from one matrix of `factor` values, means - from one matrix of cumulative
+    sums (so they are the same as of :func:`look_back` up to rounding errors). Other aggregations
+    are computed by :func:`look_back` for every period.
+
+    Parameters
+    ----------
+    factor : pd.DataFrame
+        Matrix with factor values.
+    periods : sequence of int
+        Periods to look back on the data.
+    agg : {"pct", "mean", "median", "min", "max"} or callable
+        Aggregation func to apply on `factor` values. If callable is given function must be
+        appliable on pd.Series and return float.
+
+    Returns
+    -------
+    dict of int to pd.DataFrame
+        Aggregated `factor` values for every period.
+    """
+
+    if agg == "pct":
+        factor_arr = np.asarray(factor, dtype=_float_dtype())
+        aggregated = {}
+        for period in periods:
+            base = factor_arr[:-period]
+            aggregated[period] = _like(
+                factor,
+                (factor_arr[period:] - base) / base,
+                index=factor.index[period:],
+            )
+        return aggregated
+    elif agg == "mean":
+        factor_arr = np.asarray(factor, dtype=float)
+        # infs are missing as well, as in rolling mean of pandas, and must not get into sums
+        is_nan = ~np.isfinite(factor_arr)
+        factor_arr = np.where(is_nan, np.nan, factor_arr)
+        # values are centered by mid-range to keep cumulative sums small and precise
+        center = np.fmin.reduce(factor_arr, axis=0) / 2 + np.fmax.reduce(factor_arr, axis=0) / 2
+        center = np.nan_to_num(center, nan=0, neginf=0, posinf=0)
+        sums = np.zeros((len(factor_arr) + 1, factor_arr.shape[1]))
+        np.cumsum(np.where(is_nan, 0, factor_arr - center), axis=0, out=sums[1:])
+        n_nans = np.zeros(sums.shape, dtype=int)
+        np.cumsum(is_nan, axis=0, out=n_nans[1:])
+
+        aggregated = {}
+        for period in periods:
+            # window of the t-th row consists of rows from t - period + 1 to t inclusive
+            window_sums = sums[period + 1:] - sums[1:-period]
+            window_nans = n_nans[period + 1:] - n_nans[1:-period]
+            aggregated[period] = _like(
+                factor,
+                np.where(window_nans == 0, window_sums / period + center, np.nan)
+                .astype(_float_dtype(), copy=False),
+                index=factor.index[period:],
+            )
+        return aggregated
+    else:
+        return {period: look_back(factor, period=period, agg=agg) for period in periods}
 
 
 def lag(
@@ -124,27 +247,125 @@ def lag(
     if period == 0:
         return factor
     elif period > 0:
-        return pd.DataFrame(
-            factor.to_numpy()[:-period],
-            index=factor.index[period:].copy(),
-            columns=factor.columns.copy(),
+        return _like(
+            factor,
+            np.asarray(factor)[:-period],
+            index=factor.index[period:],
         )
     else:  # period < 0
-        return pd.DataFrame(
-            factor.to_numpy()[-period:],
-            index=factor.index[:period].copy(),
-            columns=factor.columns.copy(),
+        return _like(
+            factor,
+            np.asarray(factor)[-period:],
+            index=factor.index[:period],
         )
 
 
+def lag_many(
+        factor: pd.DataFrame,
+        *,
+        periods: Sequence[int],
+) -> Lagged:
+    """Lags `factor` values for each of `periods`.
+
+    Nothing is computed or copied: returned mapping from period to lagged values creates lagged
+    matrix (a view of `factor` values, as of :func:`lag`) only when it is accessed, and all lags
+    can be taken at once as one 3d strided view by :meth:`Lagged.stack`.
+
+    Parameters
+    ----------
+    factor : pd.DataFrame
+        Matrix with factor values.
+    periods : sequence of int
+        Periods to look back on the data.
+
+    Returns
+    -------
+    Lagged
+        Lagged `factor` values for every period.
+    """
+
+    return Lagged(factor, periods=periods)
+
+
+class Lagged(Mapping[int, pd.DataFrame]):
+    """Factor values, lagged for many periods, backed by one buffer of factor values.
+
+    Mapping from period to lagged factor values (the same as of :func:`lag`), which are created
+    on access as views of factor values. Can be used for factor decay studies, e.g. to compare
+    lags 0..24 of the same matrix without building 25 dataframes.
+
+    Parameters
+    ----------
+    factor : pd.DataFrame
+        Matrix with factor values.
+    periods : sequence of int
+        Periods to look back on the data.
+    """
+
+    def __init__(
+            self,
+            factor: pd.DataFrame,
+            *,
+            periods: Sequence[int],
+    ) -> None:
+        self.factor = factor
+        self.periods = tuple(dict.fromkeys(periods))  # unique periods in the given order
+
+        # rows, where values of all lags are known
+        n_rows = len(factor)
+        start = max(max(self.periods, default=0), 0)
+        stop = max(n_rows + min(min(self.periods, default=0), 0), start)
+        self.index = factor.index[start:stop]
+        self.columns = factor.columns
+
+    def __getitem__(self, period: int) -> pd.DataFrame:
+        if period not in self.periods:
+            raise KeyError(period)
+        return lag(self.factor, period=period)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.periods)
+
+    def __len__(self) -> int:
+        return len(self.periods)
+
+    def stack(self) -> np.ndarray:
+        """Returns values of all lags as 3d array of shape (n_periods, len(index), n_assets).
+
+        The i-th matrix of the stack is lagged for the i-th period and cut to the rows of
+        :attr:`index`, where values of all lags are known. If periods are evenly spaced (e.g.
+        range(25)), the stack is a read-only strided view of factor values, otherwise it is a copy.
+        """
+
+        factor_arr = np.asarray(self.factor)
+        n_rows, n_cols = len(self.index), factor_arr.shape[1]
+        if not self.periods or n_rows == 0:
+            return np.empty((len(self.periods), n_rows, n_cols), dtype=factor_arr.dtype)
+
+        # the i-th row of the stack for the lag p is the (start + i - p)-th row of factor values
+        start = max(max(self.periods), 0)
+        steps = np.diff(self.periods)
+        if len(steps) == 0 or np.all(steps == steps[0]):
+            step = int(steps[0]) if len(steps) else 0
+            return as_strided(
+                factor_arr[start - self.periods[0]:],
+                shape=(len(self.periods), n_rows, n_cols),
+                strides=(-step * factor_arr.strides[0], *factor_arr.strides),
+                writeable=False,
+            )
+        return np.stack([factor_arr[start - p:start - p + n_rows] for p in self.periods])
+
+
 def hold(
         factor: pd.DataFrame,
         *,
         period: int,
-) -> pd.DataFrame:
+        lazy: bool = False,
+) -> pd.DataFrame | Held:
     """Spread `factor` values for `period`.
 
-    Can be used to react on new information every `period` timestamps.
+    Can be used to react on new information every `period` timestamps. Values are updated on rows
+    0, `period`, 2 * `period` and so on, whole rows are gathered without changing dtype of values.
 
     Parameters
     ----------
@@ -152,24 +373,177 @@ def hold(
         Matrix with factor values.
     period : int
         Period to look back on the data.
+    lazy : bool, default=False
+        Whether to return lazily held values, which keep only rows, where values are updated.
 
     Returns
     -------
-    pd.DataFrame
-        Rolling mean of `factor` values.
+    pd.DataFrame or Held
+        Held `factor` values.
     """
 
-    periods = np.zeros(len(factor), dtype=int)
-    update_periods = np.arange(len(factor), step=period)
-    periods[update_periods] = update_periods
-    update_mask = np.maximum.accumulate(periods[:, np.newaxis], axis=0)
-    return pd.DataFrame(
-        np.take_along_axis(np.asarray(factor, dtype=float), update_mask, axis=0),
-        index=factor.index.copy(),
-        columns=factor.columns.copy()
+    factor_arr = np.asarray(factor)
+    if lazy:
+        return Held(
+            factor_arr[::period],
+            period=period,
+            index=factor.index.copy(),
+            columns=factor.columns.copy(),
+        )
+
+    return _like(
+        factor,
+        factor_arr[_hold_rows(len(factor_arr), period)],
     )
 
 
+def hold_phases(
+        factor: pd.DataFrame,
+        *,
+        period: int,
+) -> Dict[int, pd.DataFrame]:
+    """Spread `factor` values for `period` with every possible phase of updates.
+
+    Phase i updates values on the 1st row and then on rows i, i + `period`, i + 2 * `period` and so
+    on, phase 0 is the same as :func:`hold`. All phases are gathered at once into one 3d array of
+    shape (`period`, n_periods, n_assets) and returned as its views. Can be used to backtest
+    overlapping portfolios (averaging out luck of rebalancing dates) in one vectorized run, e.g.
+    holdings of all phases can be got by :func:`pqr.ew_many` and evaluated by
+    :func:`pqr.evaluate_many`. As picking functions work row by row, it is cheaper to hold signals
+    than factor values.
+
+    Parameters
+    ----------
+    factor : pd.DataFrame
+        Matrix with factor values.
+    period : int
+        Period to look back on the data.
+
+    Returns
+    -------
+    dict of int to pd.DataFrame
+        Held `factor` values for every phase.
+    """
+
+    rows = np.arange(len(factor))
+    phases = np.arange(period)[:, np.newaxis]
+    phases_rows = np.where(rows < phases, 0, (rows - phases) // period * period + phases)
+    held = np.asarray(factor)[phases_rows]
+    return {
+        phase: _like(
+            factor,
+            held[phase],
+        )
+        for phase in range(period)
+    }
+
+
+class Held:
+    """Lazily held factor values.
+
+    Keeps only rows, on which values are updated, and repeats each of them `period` times on
+    demand. Read-only matrix like :class:`pqr.Panel` (e.g. can be passed to :func:`quantiles` or
+    :func:`top`), full matrix is materialized only on conversion to np.ndarray.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Rows, on which values are updated.
+    period : int
+        Number of rows, for which each row of `values` is held.
+    index : pd.Index
+        Index of full matrix.
+    columns : pd.Index
+        Columns of full matrix.
+    """
+
+    def __init__(
+            self,
+            values: np.ndarray,
+            *,
+            period: int,
+            index: pd.Index,
+            columns: pd.Index,
+    ) -> None:
+        self.values = values
+        self.period = period
+        self.index = index
+        self.columns = columns
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.index), len(self.columns)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.values.dtype
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __array__(self, dtype: np.dtype | None = None) -> np.ndarray:
+        rows = np.arange(len(self)) // self.period
+        return np.asarray(self.values[rows], dtype=dtype)
+
+    def blocks(self) -> np.ndarray:
+        """Returns read-only view of shape (n_blocks, `period`, n_assets) without copying values.
+
+        The last block can be longer than the rest of the matrix.
+        """
+
+        n_blocks, n_cols = self.values.shape
+        return np.broadcast_to(self.values[:, np.newaxis], (n_blocks, self.period, n_cols))
+
+    def copy(self) -> Held:
+        """Returns lazily held values with copied rows."""
+
+        return Held(self.values.copy(), period=self.period, index=self.index, columns=self.columns)
+
+    def reindex(
+            self,
+            index: Optional[pd.Index] = None,
+            columns: Optional[pd.Index] = None,
+    ) -> Held | pd.DataFrame:
+        """Conforms held values to new index and columns.
+
+        Missing values are filled with nans, dtype of values is promoted to float if needed. Only
+        columns can be changed lazily, held values are materialized to pd.DataFrame, if index is
+        changed.
+
+        Parameters
+        ----------
+        index : pd.Index, optional
+            New index. If None, index is not changed.
+        columns : pd.Index, optional
+            New columns. If None, columns are not changed.
+
+        Returns
+        -------
+        Held or pd.DataFrame
+            Reindexed held values.
+        """
+
+        if index is not None:
+            return self.to_frame().reindex(index=index, columns=columns)
+        if columns is None:
+            return self
+        return Held(
+            _take(self.values, self.columns.get_indexer(columns), axis=1),
+            period=self.period,
+            index=self.index,
+            columns=columns,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materializes held values to pd.DataFrame."""
+
+        return pd.DataFrame(
+            np.asarray(self),
+            index=self.index,
+            columns=self.columns,
+        )
+
+
 def quantiles(
         factor: pd.DataFrame,
         *,
@@ -193,12 +567,52 @@ def quantiles(
         Matrix of True/False, indicating whether factor values are between quantile boarders or not.
     """
 
-    factor_arr = np.asarray(factor)
-    lower, upper = np.nanquantile(factor_arr, [min_q, max_q], axis=1, keepdims=True)
-    return pd.DataFrame(
+    factor_arr = np.asarray(factor, dtype=_float_dtype())
+    if factor_arr.size == 0:
+        return _like(factor, np.zeros(factor_arr.shape, dtype=bool))
+    lower, upper = _nanquantiles(factor_arr, np.array([min_q, max_q]))
+    return _like(
+        factor,
         (lower <= factor_arr) & (factor_arr <= upper),
-        index=factor.index.copy(),
-        columns=factor.columns.copy(),
+    )
+
+
+def buckets(
+        factor: pd.DataFrame,
+        *,
+        q: Sequence[float],
+) -> pd.DataFrame:
+    """Splits `factor` values into buckets by quantiles `q` in a period.
+
+    Bucket i consists of values between `q[i]` (inclusive) and `q[i + 1]` (exclusive) quantiles,
+    the last bucket also includes its upper boarder. Each row is sorted only once, so splitting into
+    many buckets (e.g. deciles) costs about the same as picking one quantile band. Signals of the
+    i-th bucket can be obtained as ``labels == i``.
+
+    Parameters
+    ----------
+    factor : pd.DataFrame
+        Matrix with factor values.
+    q : sequence of float
+        Increasing quantiles to estimate boarders of buckets, e.g. [0, 1/3, 2/3, 1].
+
+    Returns
+    -------
+    pd.DataFrame
+        Matrix of bucket labels from 0 to len(`q`) - 2. Values outside of the outer boarders and
+        nans are labeled with -1.
+    """
+
+    factor_arr = np.asarray(factor, dtype=_float_dtype())
+    boarders = _nanquantiles(factor_arr, np.asarray(q, dtype=float))
+
+    labels = np.zeros(factor_arr.shape, dtype=np.min_scalar_type(-len(boarders)))
+    for boarder in boarders[1:-1]:
+        labels += factor_arr >= boarder
+    labels[~((boarders[0] <= factor_arr) & (factor_arr <= boarders[-1]))] = -1
+    return _like(
+        factor,
+        labels,
     )
 
 
@@ -222,23 +636,11 @@ def top(
         Matrix of True/False, indicating whether factor values are in the top or not.
     """
 
-    def _top_k_row(arr: np.ndarray) -> float:
-        uniq_arr = np.unique(arr[~np.isnan(arr)])
-        max_k = len(uniq_arr)
-
-        if max_k > k:
-            return np.sort(uniq_arr)[-k]
-        elif max_k > 0:
-            return np.max(uniq_arr)
-        else:
-            return np.nan
-
-    factor_arr = np.asarray(factor)
-    lower = np.apply_along_axis(_top_k_row, axis=1, arr=factor_arr)[:, np.newaxis]
-    return pd.DataFrame(
+    factor_arr = np.asarray(factor, dtype=_float_dtype())
+    lower = _kth_unique(factor_arr, k, largest=True)[:, np.newaxis]
+    return _like(
+        factor,
         factor_arr >= lower,
-        index=factor.index.copy(),
-        columns=factor.columns.copy(),
     )
 
 
@@ -262,23 +664,11 @@ def bottom(
         Matrix of True/False, indicating whether factor values are in the bottom or not.
     """
 
-    def _bottom_k_row(arr: np.ndarray) -> float:
-        uniq_arr = np.unique(arr[~np.isnan(arr)])
-        max_k = len(uniq_arr)
-
-        if max_k > k:
-            return np.sort(uniq_arr)[k - 1]
-        elif max_k > 0:
-            return np.min(uniq_arr)
-        else:
-            return np.nan
-
-    factor_arr = np.asarray(factor)
-    upper = np.apply_along_axis(_bottom_k_row, axis=1, arr=factor_arr)[:, np.newaxis]
-    return pd.DataFrame(
+    factor_arr = np.asarray(factor, dtype=_float_dtype())
+    upper = _kth_unique(factor_arr, k, largest=False)[:, np.newaxis]
+    return _like(
+        factor,
         factor_arr <= upper,
-        index=factor.index.copy(),
-        columns=factor.columns.copy()
     )
 
 
@@ -306,8 +696,154 @@ def thresholds(
     """
 
     factor_arr = np.asarray(factor)
-    return pd.DataFrame(
+    return _like(
+        factor,
         (min_t <= factor_arr) & (factor_arr <= max_t),
-        index=factor.index.copy(),
-        columns=factor.columns.copy()
     )
+
+
+def _kth_unique(
+        factor_arr: np.ndarray,
+        k: int,
+        *,
+        largest: bool,
+) -> np.ndarray:
+    """Estimates k-th largest (or smallest) unique value in every row of `factor_arr`.
+
+    Nans are ignored. If a row has not more than `k` unique values, its maximum (or minimum) is
+    taken, if a row consists only of nans - nan.
+
+    Instead of sorting full rows, `k` extreme values of each row are partitioned out and only they
+    are sorted. Only rows, which have ties among these values, are sorted fully and then scanned
+    by growing blocks until k-th unique value is found.
+    """
+
+    n_rows, n_cols = factor_arr.shape
+    if n_cols == 0:  # fmax and fmin have no identity to reduce empty rows
+        return np.full(n_rows, np.nan)
+
+    n_valid = n_cols - np.count_nonzero(np.isnan(factor_arr), axis=1)
+    row_max, row_min = np.fmax.reduce(factor_arr, axis=1), np.fmin.reduce(factor_arr, axis=1)
+    if largest:  # the largest values of factor are the smallest values of negated factor
+        sign, thresholds, extreme = -1, row_max, row_min
+    else:
+        sign, thresholds, extreme = 1, row_min, row_max
+
+    pending = np.flatnonzero(n_valid > k)  # other rows can't have more than k unique values
+    pending_arr = factor_arr[pending]
+    if largest:
+        np.negative(pending_arr, out=pending_arr)
+    m, is_sorted = min(k, n_cols), False
+    while len(pending) > 0:
+        if is_sorted:
+            block = pending_arr[:, :m]
+        else:
+            if m < n_cols:
+                pending_arr.partition(m - 1, axis=1)  # nans are moved to the end
+            block = np.sort(pending_arr[:, :m], axis=1)
+
+        is_new = np.ones_like(block, dtype=bool)
+        is_new[:, 1:] = block[:, 1:] != block[:, :-1]
+        is_new &= np.arange(m) < n_valid[pending, np.newaxis]
+        n_unique = np.cumsum(is_new, axis=1, dtype=np.int32)
+
+        found = np.flatnonzero(n_unique[:, -1] >= k)
+        kth = block[found, np.argmax(n_unique[found] >= k, axis=1)]
+        has_more = sign * extreme[pending[found]] > kth
+        thresholds[pending[found[has_more]]] = sign * kth[has_more]
+
+        resolved = (n_unique[:, -1] >= k) | (m >= n_valid[pending])
+        pending, pending_arr = pending[~resolved], pending_arr[~resolved]
+        if not is_sorted:  # rows with ties are sorted and scanned by growing blocks
+            pending_arr.sort(axis=1)
+            is_sorted = True
+        m = min(2 * m, n_cols)
+
+    return thresholds
+
+
+def _nanquantiles(
+        factor_arr: np.ndarray,
+        q: np.ndarray,
+) -> np.ndarray:
+    """Estimates quantiles `q` of every row of `factor_arr` by sorting it once.
+
+    Gives the same results as np.nanquantile with linear interpolation, but all quantiles are read
+    from one sorted matrix instead of separate nan-aware selection in every row. Returns array of
+    shape (len(`q`), n_rows, 1).
+    """
+
+    sorted_arr = np.sort(factor_arr, axis=1)  # nans are moved to the end
+    n_valid = factor_arr.shape[1] - np.count_nonzero(np.isnan(factor_arr), axis=1, keepdims=True)
+
+    virtual_idx = (n_valid - 1) * q  # the same as numpy uses for linear method
+    prev_idx = np.clip(np.floor(virtual_idx), 0, np.maximum(n_valid - 1, 0)).astype(int)
+    next_idx = np.minimum(prev_idx + 1, np.maximum(n_valid - 1, 0))
+    gamma = virtual_idx - np.floor(virtual_idx)
+    gamma[virtual_idx >= n_valid - 1] = 0
+
+    prev_values = np.take_along_axis(sorted_arr, prev_idx, axis=1)
+    next_values = np.take_along_axis(sorted_arr, next_idx, axis=1)
+    diff = next_values - prev_values
+    quantiles = prev_values + diff * gamma
+    np.subtract(next_values, diff * (1 - gamma), out=quantiles, where=gamma >= 0.5)
+    quantiles[(n_valid == 0).ravel()] = np.nan
+    return quantiles.T[:, :, np.newaxis]
+
+
+def _rolling_apply(
+        factor_arr: np.ndarray,
+        period: int,
+        agg: Callable[[np.ndarray], np.ndarray],
+        max_block_size: int = 2 ** 22,
+) -> np.ndarray:
+    """Applies vectorized `agg` on rolling windows of `factor_arr`.
+
+    Windows are strided views of shape (n_windows, `period`, n_assets), they are passed to `agg` by
+    blocks of not more than `max_block_size` elements, so temporary arrays, created by `agg`, are
+    not much bigger than that. The first window is dropped as in :func:`look_back`.
+    """
+
+    n_rows, n_cols = factor_arr.shape
+    aggregated = np.empty((max(n_rows - period, 0), n_cols), dtype=factor_arr.dtype)
+    if aggregated.size == 0:  # also guards division by the number of assets below
+        return aggregated
+
+    windows = np.moveaxis(sliding_window_view(factor_arr, period, axis=0), -1, 1)[1:]
+    step = max(max_block_size // (period * n_cols), 1)
+    for start in range(0, len(windows), step):
+        aggregated[start:start + step] = agg(windows[start:start + step])
+    return aggregated
+
+
+_MAX_SMALL_MEDIAN_PERIOD = 16
+
+
+def _rolling_median(
+        factor_arr: np.ndarray,
+        period: int,
+) -> np.ndarray:
+    """Calculates rolling median of `factor_arr` columns, dropping the first `period` rows.
+
+    Median is nan, if there is a nan in a window. The fastest available kernel is chosen:
+
+    * two heaps of bottleneck.move_median, O(log `period`) per step, if bottleneck is installed;
+    * selection in strided windows for small periods, where it is faster than a skiplist;
+    * skiplist of pandas rolling median, O(log `period`) per step, otherwise.
+    """
+
+    if len(factor_arr) <= period:
+        return np.empty((0, factor_arr.shape[1]), dtype=factor_arr.dtype)
+    elif bn is not None:
+        return bn.move_median(factor_arr, period, axis=0)[period:]
+    elif period <= _MAX_SMALL_MEDIAN_PERIOD:
+        return _rolling_apply(factor_arr, period, lambda windows: np.median(windows, axis=1))
+    else:
+        median = pd.DataFrame(factor_arr).rolling(period).median().to_numpy()[period:]
+        return median.astype(factor_arr.dtype, copy=False)
+
+
+def _hold_rows(n_rows: int, period: int) -> np.ndarray:
+    """Returns indices of rows, which values are held on every row."""
+
+    return np.arange(n_rows) // period * period
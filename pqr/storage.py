@@ -0,0 +1,202 @@
+"""On-disk storage of matrices, which are reopened as memory-mapped panels."""
+
+from __future__ import annotations
+
+__all__ = [
+    "save",
+    "load",
+    "create",
+    "Store",
+]
+
+import os
+import pickle
+import shutil
+from typing import Iterator, Literal, MutableMapping
+
+import numpy as np
+import pandas as pd
+
+from pqr.panel import Panel
+
+_VALUES_FILE = "values.npy"
+_AXES_FILE = "axes.pickle"
+
+
+def save(
+        path: str | os.PathLike,
+        matrix: pd.DataFrame | Panel,
+) -> None:
+    """Saves `matrix` to directory `path`.
+
+    Values are saved as .npy file, which can be memory-mapped, index and columns are pickled next
+    to it. Existing matrix in `path` is overwritten.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        Directory to save the matrix in. Created if it doesn't exist.
+    matrix : pd.DataFrame or Panel
+        Matrix with numeric or boolean values.
+    """
+
+    values = np.asarray(matrix)
+    if values.dtype == object:
+        raise ValueError("only matrices with numeric or boolean values can be saved")
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, _VALUES_FILE), values, allow_pickle=False)
+    _save_axes(path, matrix.index, matrix.columns)
+
+
+def load(
+        path: str | os.PathLike,
+        *,
+        mmap_mode: Literal["r", "r+", "c"] | None = "r",
+) -> Panel:
+    """Opens matrix, saved to directory `path`.
+
+    By default values are memory-mapped read-only, so they are not loaded into memory until they
+    are accessed and pages of the file are shared between all processes, which opened it. Panel
+    can be passed to any step directly or converted to pd.DataFrame by :meth:`Panel.to_frame`
+    without copying.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        Directory with saved matrix.
+    mmap_mode : {"r", "r+", "c"} or None, default="r"
+        Mode of memory-mapping as in np.load. If None, values are read into memory.
+
+    Returns
+    -------
+    Panel
+        Saved matrix.
+    """
+
+    values = np.load(os.path.join(path, _VALUES_FILE), mmap_mode=mmap_mode, allow_pickle=False)
+    index, columns = _load_axes(path)
+    return Panel(values, index=index, columns=columns)
+
+
+def create(
+        path: str | os.PathLike,
+        *,
+        index: pd.Index,
+        columns: pd.Index,
+        dtype: np.dtype = np.float64,
+) -> Panel:
+    """Creates matrix in directory `path` and opens it memory-mapped for writing.
+
+    Can be used to fill matrices, which don't fit into memory, block by block. Values are
+    initialized with zeros.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        Directory to create the matrix in. Created if it doesn't exist.
+    index : pd.Index
+        Index of the matrix.
+    columns : pd.Index
+        Columns of the matrix.
+    dtype : np.dtype, default=np.float64
+        Numeric or boolean dtype of values.
+
+    Returns
+    -------
+    Panel
+        Writable memory-mapped matrix.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    values = np.lib.format.open_memmap(
+        os.path.join(path, _VALUES_FILE),
+        mode="w+",
+        dtype=dtype,
+        shape=(len(index), len(columns)),
+    )
+    _save_axes(path, index, columns)
+    return Panel(values, index=index, columns=columns)
+
+
+class Store(MutableMapping[str, Panel]):
+    """Directory of named matrices.
+
+    Behaves like a dict: matrices are saved by assignment (see :func:`save`), opened memory-mapped
+    by subscription (see :func:`load`) and removed from disk by deletion.
+
+    Parameters
+    ----------
+    root : str or os.PathLike
+        Directory of the store. Created if it doesn't exist.
+    mmap_mode : {"r", "r+", "c"} or None, default="r"
+        Mode of memory-mapping of opened matrices.
+    """
+
+    def __init__(
+            self,
+            root: str | os.PathLike,
+            *,
+            mmap_mode: Literal["r", "r+", "c"] | None = "r",
+    ) -> None:
+        self.root = os.fspath(root)
+        self.mmap_mode = mmap_mode
+        os.makedirs(self.root, exist_ok=True)
+
+    def __getitem__(self, name: str) -> Panel:
+        if name not in self:
+            raise KeyError(name)
+        return load(self._path(name), mmap_mode=self.mmap_mode)
+
+    def __setitem__(self, name: str, matrix: pd.DataFrame | Panel) -> None:
+        save(self._path(name), matrix)
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self:
+            raise KeyError(name)
+        shutil.rmtree(self._path(name))
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str) or not _is_valid_name(name):
+            return False
+        return os.path.isfile(os.path.join(self.root, name, _VALUES_FILE))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(name for name in os.listdir(self.root) if name in self))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Store({self.root!r})"
+
+    def create(
+            self,
+            name: str,
+            *,
+            index: pd.Index,
+            columns: pd.Index,
+            dtype: np.dtype = np.float64,
+    ) -> Panel:
+        """Creates matrix `name` and opens it memory-mapped for writing, see :func:`create`."""
+
+        return create(self._path(name), index=index, columns=columns, dtype=dtype)
+
+    def _path(self, name: str) -> str:
+        if not _is_valid_name(name):
+            raise ValueError(f"invalid name of a matrix: {name!r}")
+        return os.path.join(self.root, name)
+
+
+def _is_valid_name(name: str) -> bool:
+    return bool(name) and os.sep not in name and "/" not in name and name not in (".", "..")
+
+
+def _save_axes(path: str | os.PathLike, index: pd.Index, columns: pd.Index) -> None:
+    with open(os.path.join(path, _AXES_FILE), "wb") as file:
+        pickle.dump((index, columns), file)
+
+
+def _load_axes(path: str | os.PathLike) -> tuple[pd.Index, pd.Index]:
+    with open(os.path.join(path, _AXES_FILE), "rb") as file:
+        return pickle.load(file)
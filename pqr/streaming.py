@@ -0,0 +1,263 @@
+"""Streaming versions of operations for data, which is processed by chunks of periods."""
+
+from __future__ import annotations
+
+__all__ = [
+    "StreamingLookBack",
+    "StreamingLag",
+    "StreamingHold",
+    "StreamingEvaluate",
+]
+
+from typing import Callable, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from pqr.panel import Panel, _like
+from pqr.picking import look_back, lag
+from pqr.utils import align
+
+
+class StreamingLookBack:
+    """Streaming version of :func:`pqr.look_back`.
+
+    Chunks of consecutive periods are passed one after another, the last `period` rows are carried
+    between chunks, so memory usage doesn't grow with the length of history. Concatenated outputs
+    for all chunks are the same as output of :func:`pqr.look_back` for the whole history: bit for
+    bit for "pct", "min", "max", "median" and callable `agg`, and up to rounding errors for
+    aggregations, based on running sums ("mean", "std", "var", "sum", "skew", "zscore"), which are
+    restarted on every chunk.
+
+    Can be used as a step of a pipeline, which is called for every chunk.
+
+    Parameters
+    ----------
+    period : int
+        Period to look back on the data.
+    agg : {"pct", "mean", "median", "min", "max", "std", "var", "sum", "skew", "zscore"} or callable
+        Aggregation func to apply on factor values, see :func:`pqr.look_back`.
+    vectorized : bool, default=False
+        Whether callable `agg` is vectorized.
+    """
+
+    def __init__(
+            self,
+            *,
+            period: int,
+            agg: Literal[
+                "pct", "mean", "median", "min", "max", "std", "var", "sum", "skew", "zscore"
+            ] | Callable[[pd.Series], float] | Callable[[np.ndarray], np.ndarray],
+            vectorized: bool = False,
+    ) -> None:
+        self.period = period
+        self.agg = agg
+        self.vectorized = vectorized
+        self._tail = _Tail(period)
+
+    def update(self, chunk: pd.DataFrame | Panel) -> pd.DataFrame | Panel:
+        """Aggregates factor values of the next `chunk` of periods.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame or Panel
+            Matrix with factor values for the next periods.
+
+        Returns
+        -------
+        pd.DataFrame or Panel
+            Aggregated factor values for periods of `chunk`, which have enough history (the first
+            `period` rows of the whole history are dropped).
+        """
+
+        factor = self._tail.extend(chunk)
+        return look_back(factor, period=self.period, agg=self.agg, vectorized=self.vectorized)
+
+    __call__ = update
+
+
+class StreamingLag:
+    """Streaming version of :func:`pqr.lag`.
+
+    The last abs(`period`) rows are carried between chunks. Concatenated outputs for all chunks are
+    the same as output of :func:`pqr.lag` for the whole history. If `period` is negative, the last
+    rows of a chunk are emitted with the next chunk, when their future values become known.
+
+    Can be used as a step of a pipeline, which is called for every chunk.
+
+    Parameters
+    ----------
+    period : int
+        Period to look back on the data.
+    """
+
+    def __init__(self, *, period: int) -> None:
+        self.period = period
+        self._tail = _Tail(abs(period))
+
+    def update(self, chunk: pd.DataFrame | Panel) -> pd.DataFrame | Panel:
+        """Lags factor values of the next `chunk` of periods.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame or Panel
+            Matrix with factor values for the next periods.
+
+        Returns
+        -------
+        pd.DataFrame or Panel
+            Lagged factor values, which are known after `chunk`.
+        """
+
+        return lag(self._tail.extend(chunk), period=self.period)
+
+    __call__ = update
+
+
+class StreamingHold:
+    """Streaming version of :func:`pqr.hold`.
+
+    Number of already processed rows (phase of updates) and the last held row are carried between
+    chunks. Concatenated outputs for all chunks are the same as output of :func:`pqr.hold` for the
+    whole history.
+
+    Can be used as a step of a pipeline, which is called for every chunk.
+
+    Parameters
+    ----------
+    period : int
+        Period to hold values for.
+    """
+
+    def __init__(self, *, period: int) -> None:
+        self.period = period
+        self._n_rows = 0
+        self._held_row = None
+
+    def update(self, chunk: pd.DataFrame | Panel) -> pd.DataFrame | Panel:
+        """Holds factor values of the next `chunk` of periods.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame or Panel
+            Matrix with factor values for the next periods.
+
+        Returns
+        -------
+        pd.DataFrame or Panel
+            Held factor values for periods of `chunk`.
+        """
+
+        chunk_arr = np.asarray(chunk)
+        if len(chunk_arr) == 0:
+            return chunk
+
+        # rows, which values are held on every row of the chunk, -1 is the carried row
+        rows = np.arange(self._n_rows, self._n_rows + len(chunk_arr))
+        rows = np.maximum(rows // self.period * self.period - self._n_rows, -1)
+        if self._held_row is not None:
+            chunk_arr = np.concatenate([self._held_row, chunk_arr])
+            rows += 1
+
+        held = chunk_arr[rows]
+        self._n_rows += len(held)
+        self._held_row = held[-1:].copy()
+        return _like(chunk, held)
+
+    __call__ = update
+
+
+class StreamingEvaluate:
+    """Streaming version of :func:`pqr.evaluate`.
+
+    The last row of holdings is carried between chunks to earn returns of the first period of the
+    next chunk. Concatenated outputs for all chunks are the same as output of :func:`pqr.evaluate`
+    for the whole history.
+
+    Can be used as a step of a pipeline, which is called for every chunk.
+
+    Parameters
+    ----------
+    universe_returns : pd.DataFrame or Panel
+        Returns of universe, available to trade for a strategy. Can cover the whole history (it
+        is aligned with every chunk) or be given with every chunk to :meth:`update`.
+    """
+
+    def __init__(self, *, universe_returns: Optional[pd.DataFrame | Panel] = None) -> None:
+        self.universe_returns = universe_returns
+        self._last_holdings = None
+
+    def update(
+            self,
+            holdings: pd.DataFrame | Panel,
+            universe_returns: Optional[pd.DataFrame | Panel] = None,
+    ) -> pd.Series:
+        """Calculates portfolio returns for the next chunk of periods.
+
+        Parameters
+        ----------
+        holdings : pd.DataFrame or Panel
+            Weights of a portfolio for the next periods.
+        universe_returns : pd.DataFrame or Panel, optional
+            Returns of universe for the next periods. If None, returns, given on initialization,
+            are used.
+
+        Returns
+        -------
+        pd.Series
+            Periodic returns of a portfolio for periods of the chunk.
+        """
+
+        if universe_returns is None:
+            universe_returns = self.universe_returns
+        holdings, universe_returns = align(holdings, universe_returns)
+        holdings_arr = np.asarray(holdings)
+        returns = np.zeros(len(holdings_arr))
+        if len(holdings_arr) == 0:
+            return pd.Series(returns, index=holdings.index.copy())
+
+        universe_returns_arr = np.asarray(universe_returns)
+        if self._last_holdings is None:  # the 1st period of the whole history has zero return
+            returns[1:] = np.multiply(
+                holdings_arr[:-1], universe_returns_arr[1:], dtype=np.float64
+            ).sum(axis=1)
+        else:
+            previous_holdings = np.concatenate([self._last_holdings, holdings_arr[:-1]])
+            returns[:] = np.multiply(
+                previous_holdings, universe_returns_arr, dtype=np.float64
+            ).sum(axis=1)
+
+        self._last_holdings = holdings_arr[-1:].copy()
+        return pd.Series(returns, index=holdings.index.copy())
+
+    __call__ = update
+
+
+class _Tail:
+    """The last rows of a stream of chunks."""
+
+    def __init__(self, n_rows: int) -> None:
+        self.n_rows = n_rows
+        self.values = None
+        self.index = None
+        self.columns = None
+
+    def extend(self, chunk: pd.DataFrame | Panel) -> pd.DataFrame | Panel:
+        """Returns `chunk` with the carried rows prepended and carries the last rows of it."""
+
+        if self.values is None or len(self.values) == 0:
+            extended = chunk
+        else:
+            if not self.columns.equals(chunk.columns):
+                raise ValueError("columns of all chunks must be the same")
+            extended = _like(
+                chunk,
+                np.concatenate([self.values, np.asarray(chunk)]),
+                index=self.index.append(chunk.index),
+            )
+
+        if self.n_rows > 0:
+            self.values = np.asarray(extended)[-self.n_rows:].copy()
+            self.index = extended.index[-self.n_rows:]
+            self.columns = extended.columns
+        return extended
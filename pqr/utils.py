@@ -6,76 +6,657 @@ __all__ = [
     "align",
     "compose",
     "freeze",
+    "Pipeline",
+    "Cache",
+    "fingerprint",
+    "profile",
+    "Profile",
 ]
 
-from functools import reduce, partial as freeze
-from typing import Callable, Any
+import hashlib
+import sys
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial as freeze
+from typing import Callable, Any, Iterable, Iterator, Hashable, NamedTuple, Optional
 
+import numpy as np
 import pandas as pd
 
+from pqr.panel import Panel, PackedSignals, _to_panel, _from_panel
 
-def align(*args: pd.DataFrame | pd.Series) -> tuple[pd.DataFrame | pd.Series, ...]:
-    """Aligns dataframes and series to ake them having the same index and columns.
+
+def align(
+        *args: pd.DataFrame | pd.Series | Panel | PackedSignals,
+        copy: bool = False,
+) -> tuple[pd.DataFrame | pd.Series | Panel | PackedSignals, ...]:
+    """Aligns dataframes, panels and series to ake them having the same index and columns.
+
+    Intersection of all indices and all columns is found at once, then every dataframe or series
+    is reindexed only once. Any matrix with index, columns and reindex method (e.g. lazily held
+    values) can be aligned. Already aligned dataframes and series are returned as is, without
+    copying.
 
     Parameters
     ----------
-    args : sequence of pd.DataFrame or pd.Series
-        Dataframes and series to be aligned.
+    args : sequence of pd.DataFrame, pd.Series, Panel or PackedSignals
+        Dataframes, series, panels and packed signals to be aligned.
+    copy : bool, default=False
+        Whether to guarantee, that returned dataframes and series don't share data with `args`.
+        Should be set if aligned data is going to be modified inplace.
 
     Returns
     -------
-    tuple of pd.DataFrame or pd.Series
-      Aligned dataframes and series.
+    tuple of pd.DataFrame, pd.Series, Panel or PackedSignals
+      Aligned dataframes, series, panels and packed signals.
     """
 
-    args = list(args)
-    for i in range(len(args) - 1):  # forward-aligning
-        args[i], args[i + 1] = _align_two(args[i], args[i + 1])
+    index = _intersect_indexes([arg.index for arg in args])
+    columns = _intersect_indexes(
+        [arg.columns for arg in args if hasattr(arg, "columns")]
+    )
+
+    aligned = []
+    for arg in args:
+        axes = {}
+        if not _indexes_equal(arg.index, index):
+            axes["index"] = index
+        if hasattr(arg, "columns") and not _indexes_equal(arg.columns, columns):
+            axes["columns"] = columns
+
+        if axes:
+            aligned.append(arg.reindex(**axes))
+        else:
+            aligned.append(arg.copy() if copy else arg)
+    return tuple(aligned)
+
 
-    for i in range(len(args) - 2, 0, -1):  # backward-aligning
-        args[i], args[i - 1] = _align_two(args[i], args[i - 1])
-    return tuple(args)
+def _intersect_indexes(indexes: list[pd.Index]) -> pd.Index | None:
+    if not indexes:
+        return None
 
+    intersection = indexes[0]
+    for index in indexes[1:]:
+        if not _indexes_equal(intersection, index):
+            intersection = intersection.intersection(index)
+    return intersection
 
-def _are_aligned(
-        x: pd.DataFrame | pd.Series,
-        y: pd.DataFrame | pd.Series,
-        /,
-) -> tuple[pd.DataFrame | pd.Series, pd.DataFrame | pd.Series]:
-    index_aligned = ((x.index.shape == y.index.shape) and (x.index == y.index).all())
-    if isinstance(x, pd.Series) or isinstance(y, pd.Series):
-        return index_aligned
 
-    columns_aligned = ((x.columns.shape == y.columns.shape) and (x.columns == y.columns).all())
-    return index_aligned and columns_aligned
+_equal_indexes: dict[tuple[int, int], tuple[weakref.ref, weakref.ref]] = {}
 
 
-def _align_two(
-        x: pd.DataFrame | pd.Series,
-        y: pd.DataFrame | pd.Series,
-        /,
-) -> tuple[pd.DataFrame | pd.Series, pd.DataFrame | pd.Series]:
-    if _are_aligned(x, y):
-        return x.copy(), y.copy()
+def _indexes_equal(x: pd.Index, y: pd.Index, /) -> bool:
+    # indexes are immutable, so once compared they stay equal while both are alive
+    if x is y:
+        return True
 
-    if isinstance(x, pd.Series) or isinstance(y, pd.Series):
-        return x.align(y, join="inner", axis=0)
+    key = id(x), id(y)
+    if key in _equal_indexes:
+        x_ref, y_ref = _equal_indexes[key]
+        if x_ref() is x and y_ref() is y:
+            return True
 
-    return x.align(y, join="inner")
+    if not x.equals(y):
+        return False
 
+    def forget(_: weakref.ref) -> None:
+        _equal_indexes.pop(key, None)
 
-def compose(*steps) -> Callable[[Any, ...], Any]:
+    _equal_indexes[key] = weakref.ref(x, forget), weakref.ref(y, forget)
+    return True
+
+
+def compose(
+        *steps: Callable,
+        cache: Optional[Cache] = None,
+        panel: bool = False,
+) -> Pipeline:
     """Combines functions to pipeline.
 
     Parameters
     ----------
     steps : sequence of callable
          Steps to be composed into pipeline.
+    cache : Cache, optional
+        Cache to memoize intermediate results of the pipeline.
+    panel : bool, default=False
+        Whether to pass :class:`Panel` instead of pd.DataFrame between steps of the pipeline.
 
     Returns
     -------
-    callable
+    Pipeline
         Function, realizing full pipeline.
     """
 
-    return reduce(lambda f, g: lambda *args, **kwargs: g(f(*args, **kwargs)), steps)
+    return Pipeline(steps, cache=cache, panel=panel)
+
+
+class Pipeline:
+    """Sequence of steps, applied one after another.
+
+    Arguments of a call are passed to the first step, then output of each step is passed to the
+    next one. Unlike chain of lambdas, pipeline keeps its steps as data, so it can be pickled (e.g.
+    to be sent to a process pool), compared, hashed and iterated over.
+
+    Pipelines are equal if their steps call the same functions with the same frozen arguments.
+    Unhashable frozen arguments (e.g. dataframes) are compared by identity.
+
+    Parameters
+    ----------
+    steps : iterable of callable
+        Steps of the pipeline, e.g. functions with frozen parameters. Nested pipelines are
+        flattened.
+    cache : Cache, optional
+        Cache to memoize intermediate results of the pipeline. Doesn't affect equality of
+        pipelines.
+    panel : bool, default=False
+        Whether to pass :class:`Panel` instead of pd.DataFrame between steps of the pipeline.
+        Dataframes among arguments of a call are converted to panels and resulting panels (also
+        values of a resulting dict) are converted back to dataframes, so pandas is used only at
+        the edges of the pipeline. Doesn't affect equality of pipelines.
+    """
+
+    def __init__(
+            self,
+            steps: Iterable[Callable],
+            *,
+            cache: Optional[Cache] = None,
+            panel: bool = False,
+    ) -> None:
+        self.steps = tuple(_flatten_steps(steps))
+        if not self.steps:
+            raise ValueError("pipeline must have at least one step")
+        self.cache = cache
+        self.panel = panel
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if self.panel:
+            args = tuple(map(_to_panel, args))
+            kwargs = {name: _to_panel(value) for name, value in kwargs.items()}
+
+        if self.cache is not None:
+            result = self.cache.run(self.steps, *args, **kwargs)
+        else:
+            _begin_run()
+            result = _call_step(self.steps[0], 0, *args, **kwargs)
+            for i in range(1, len(self.steps)):
+                result = _call_step(self.steps[i], i, result)
+        return _from_panel(result) if self.panel else result
+
+    def __iter__(self) -> Iterator[Callable]:
+        return iter(self.steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __getitem__(self, item: int | slice) -> Callable | Pipeline:
+        if isinstance(item, slice):
+            return Pipeline(self.steps[item], cache=self.cache, panel=self.panel)
+        return self.steps[item]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Pipeline):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"Pipeline({', '.join(map(_describe_step, self.steps))})"
+
+    def _key(self) -> tuple[Hashable, ...]:
+        return tuple(map(_step_key, self.steps))
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a :class:`Cache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    nbytes: int
+
+
+class Cache:
+    """Memoizes intermediate results of pipelines.
+
+    Result of every step is stored under the key, consisting of fingerprint of the pipeline input,
+    functions of all steps up to this one and their frozen parameters. So pipelines, which share
+    leading steps (e.g. the same filtering and look back, but different quantiles), reuse results
+    of the longest common prefix instead of recomputing it. Dataframes among inputs and frozen
+    parameters are compared by content (see :func:`fingerprint`), not by identity, as well as
+    lists, tuples and dicts. Other unhashable parameters are compared by identity and kept alive
+    by the cache while their results are stored.
+
+    Least recently used results are evicted, when the cache grows bigger than allowed. Cached
+    results are shared between runs, so they must not be modified inplace.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Max number of stored results. If None, the number is not limited.
+    maxbytes : int, optional
+        Max total size of stored results in bytes. If None, the size is not limited.
+    """
+
+    def __init__(
+            self,
+            maxsize: Optional[int] = 128,
+            maxbytes: Optional[int] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.clear()
+
+    def run(self, steps: Iterable[Callable], *args: Any, **kwargs: Any) -> Any:
+        """Runs pipeline `steps` on given arguments, reusing stored intermediate results.
+
+        Parameters
+        ----------
+        steps : iterable of callable
+            Pipeline or any other sequence of steps.
+        args, kwargs
+            Arguments of the first step.
+
+        Returns
+        -------
+        Any
+            Output of the last step.
+        """
+
+        steps = tuple(_flatten_steps(steps))
+        keys, key = [], (tuple(map(self._fingerprint, args)), self._fingerprint_kwargs(kwargs))
+        for step in steps:
+            key = (key, self._fingerprint_step(step))
+            keys.append(key)
+
+        start, result = 0, None
+        for i in range(len(keys) - 1, -1, -1):  # look for the longest cached prefix
+            if keys[i] in self._results:
+                self._results.move_to_end(keys[i])
+                start, result = i + 1, self._results[keys[i]][0]
+                break
+        self._hits += start
+        self._misses += len(steps) - start
+
+        _begin_run()
+        for i in range(start, len(steps)):
+            if i == 0:
+                result = _call_step(steps[i], i, *args, **kwargs)
+            else:
+                result = _call_step(steps[i], i, result)
+            self._store(keys[i], result)
+        return result
+
+    def info(self) -> CacheInfo:
+        """Returns statistics of the cache.
+
+        Hits count steps, which results were reused, misses - steps, which were computed.
+        """
+
+        return CacheInfo(
+            self._hits,
+            self._misses,
+            self._evictions,
+            len(self._results),
+            self._nbytes,
+        )
+
+    def clear(self) -> None:
+        """Removes all stored results and resets statistics."""
+
+        self._results = OrderedDict()
+        self._hits = self._misses = self._evictions = self._nbytes = 0
+
+    def _fingerprint(self, value: Any) -> Hashable:
+        if isinstance(value, (pd.DataFrame, pd.Series, Panel, np.ndarray)):
+            return fingerprint(value)
+        elif isinstance(value, (list, tuple)):  # e.g. quantiles of buckets or periods
+            return type(value).__name__, tuple(map(self._fingerprint, value))
+        elif isinstance(value, dict):
+            return "dict", tuple((key, self._fingerprint(item)) for key, item in value.items())
+
+        try:
+            hash(value)
+        except TypeError:
+            # the key keeps the value alive, so its id can't be reused by another object
+            return "<unhashable>", _Identity(value)
+        return value
+
+    def _fingerprint_kwargs(self, kwargs: dict[str, Any]) -> Hashable:
+        return tuple((name, self._fingerprint(value)) for name, value in sorted(kwargs.items()))
+
+    def _fingerprint_step(self, step: Callable) -> Hashable:
+        if isinstance(step, freeze):
+            return (
+                step.func,
+                tuple(map(self._fingerprint, step.args)),
+                self._fingerprint_kwargs(step.keywords),
+            )
+        return step
+
+    def _store(self, key: Hashable, result: Any) -> None:
+        nbytes = _nbytes(result)
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            return
+
+        self._results[key] = (result, nbytes)
+        self._nbytes += nbytes
+        while ((self.maxsize is not None and len(self._results) > self.maxsize)
+               or (self.maxbytes is not None and self._nbytes > self.maxbytes)):
+            _, (_, evicted_nbytes) = self._results.popitem(last=False)
+            self._nbytes -= evicted_nbytes
+            self._evictions += 1
+
+    def __getstate__(self) -> dict[str, Any]:
+        # stored results are not sent to other processes, they can be recomputed there
+        return {"maxsize": self.maxsize, "maxbytes": self.maxbytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+
+def fingerprint(
+        value: pd.DataFrame | pd.Series | Panel | np.ndarray,
+        *,
+        sample: Optional[int] = None,
+) -> Hashable:
+    """Calculates fingerprint of a matrix by its content.
+
+    Fingerprint is blake2b hash of raw buffer of values, index and columns, together with type,
+    shape and dtype, so equal matrices have equal fingerprints and different matrices have different
+    fingerprints with overwhelming probability. It can be used as a key of a cache for big matrices.
+
+    Full fingerprints are remembered while matrices are alive, so repeated calls for the same object
+    take constant time. Remembered fingerprint is validated by identity of index and columns (so
+    reassigned axes are noticed) and a quick check of a few sampled rows of values, so most inplace
+    modifications are noticed, but modifications outside of sampled rows are not:
+    matrices should not be modified inplace after fingerprinting.
+
+    Parameters
+    ----------
+    value : pd.DataFrame, pd.Series, Panel or np.ndarray
+        Matrix to be fingerprinted.
+    sample : int, optional
+        If given, only `sample` evenly spaced rows are hashed (index and columns are hashed fully).
+        Such fingerprint is much cheaper for big matrices and is not remembered, but it doesn't
+        distinguish matrices, which differ only in not sampled rows.
+
+    Returns
+    -------
+    Hashable
+        Fingerprint of the matrix.
+    """
+
+    if sample is not None:
+        return _fingerprint(value, rows=_sample_rows(len(value), sample))
+
+    key = id(value)
+    # indexes are immutable, but can be reassigned to a dataframe, so their identity is checked
+    # together with sampled rows of values
+    axes = getattr(value, "index", None), getattr(value, "columns", None)
+    values = np.asarray(value)
+    check = hashlib.blake2b(
+        _raw_bytes(values[_sample_rows(len(values), _N_CHECKED_ROWS)]),
+        digest_size=16,
+    ).digest()
+    if key in _fingerprints:
+        ref, full, remembered_axes, remembered_check = _fingerprints[key]
+        if (ref() is value and remembered_check == check
+                and all(x is y for x, y in zip(axes, remembered_axes))):
+            return full
+
+    full = _fingerprint(value)
+    _fingerprints[key] = (
+        weakref.ref(value, lambda _: _fingerprints.pop(key, None)),
+        full,
+        axes,
+        check,
+    )
+    return full
+
+
+_N_CHECKED_ROWS = 8
+
+_fingerprints: dict[int, tuple[weakref.ref, Hashable, tuple[Any, Any], bytes]] = {}
+
+
+@contextmanager
+def profile(*, memory: bool = True) -> Iterator[Profile]:
+    """Records time and memory, spent by every step of pipelines, run inside the context.
+
+    Both :class:`Pipeline` calls and :meth:`Cache.run` are recorded, steps, which results are
+    taken from a cache, are not executed and not recorded. Profiles can be nested.
+
+    Parameters
+    ----------
+    memory : bool, default=True
+        Whether to trace memory allocations by tracemalloc. Tracing slows down allocations, so it
+        can be turned off to measure only time.
+
+    Yields
+    ------
+    Profile
+        Records of executed steps.
+    """
+
+    prof = Profile(memory=memory)
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    _profiles.append(prof)
+    try:
+        yield prof
+    finally:
+        _profiles.remove(prof)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+class Profile:
+    """Records of steps, executed inside :func:`profile`.
+
+    Every record consists of:
+
+    * run - number of pipeline run in the profile;
+    * step - position of the step in the pipeline;
+    * func - name of the function of the step;
+    * name - description of the step with its frozen parameters;
+    * seconds - wall time of the step;
+    * peak_bytes - peak memory, allocated by the step above the memory allocated before it, or
+      nan if memory is not traced;
+    * input_shape and output_shape - shapes of the 1st argument and of the result of the step, or
+      None if they have no shape.
+
+    Parameters
+    ----------
+    memory : bool, default=True
+        Whether memory allocations are traced.
+    """
+
+    columns = [
+        "run",
+        "step",
+        "func",
+        "name",
+        "seconds",
+        "peak_bytes",
+        "input_shape",
+        "output_shape",
+    ]
+
+    def __init__(self, *, memory: bool = True) -> None:
+        self.memory = memory
+        self.records = []
+        self.n_runs = 0
+
+    def report(self) -> pd.DataFrame:
+        """Returns all records, one row for each executed step.
+
+        Reports of many profiles (e.g. from different processes) can be concatenated by pd.concat
+        before aggregation.
+        """
+
+        return pd.DataFrame(self.records, columns=self.columns)
+
+    def summary(self, by: str | list[str] = "func") -> pd.DataFrame:
+        """Aggregates records by `by` columns.
+
+        Parameters
+        ----------
+        by : str or list of str, default="func"
+            Columns of the report to group records by.
+
+        Returns
+        -------
+        pd.DataFrame
+            Number of calls, total and mean wall time and max peak memory for every group, sorted
+            by total time in descending order.
+        """
+
+        return self.report().groupby(by, sort=False).agg(
+            calls=("seconds", "size"),
+            total_seconds=("seconds", "sum"),
+            mean_seconds=("seconds", "mean"),
+            max_peak_bytes=("peak_bytes", "max"),
+        ).sort_values("total_seconds", ascending=False)
+
+
+_profiles: list[Profile] = []
+
+
+def _begin_run() -> None:
+    for prof in _profiles:
+        prof.n_runs += 1
+
+
+def _call_step(step: Callable, position: int, *args: Any, **kwargs: Any) -> Any:
+    if not _profiles:
+        return step(*args, **kwargs)
+
+    memory = tracemalloc.is_tracing() and any(prof.memory for prof in _profiles)
+    if memory:
+        _reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    result = step(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes if memory else np.nan
+
+    func = step.func if isinstance(step, freeze) else step
+    for prof in _profiles:
+        prof.records.append((
+            prof.n_runs,
+            position,
+            getattr(func, "__name__", repr(func)),
+            _describe_step(step),
+            seconds,
+            peak_bytes if prof.memory else np.nan,
+            getattr(args[0], "shape", None) if args else None,
+            getattr(result, "shape", None),
+        ))
+    return result
+
+
+def _reset_peak() -> None:
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:  # python 3.8
+        tracemalloc.clear_traces()
+
+
+def _flatten_steps(steps: Iterable[Callable]) -> Iterator[Callable]:
+    for step in steps:
+        if isinstance(step, Pipeline):
+            yield from step.steps
+        else:
+            yield step
+
+
+def _step_key(step: Callable) -> Hashable:
+    if isinstance(step, freeze):
+        return (
+            step.func,
+            tuple(map(_value_key, step.args)),
+            tuple((name, _value_key(value)) for name, value in sorted(step.keywords.items())),
+        )
+    return step
+
+
+def _value_key(value: Any) -> Hashable:
+    try:
+        hash(value)
+    except TypeError:
+        return "<unhashable>", id(value)
+    return value
+
+
+class _Identity:
+    """Hashable reference to an object, which is compared by identity."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, _Identity) and self.value is other.value
+
+    def __hash__(self) -> int:
+        return id(self.value)
+
+
+def _describe_step(step: Callable) -> str:
+    if isinstance(step, freeze):
+        params = [_describe_value(value) for value in step.args]
+        params.extend(f"{name}={_describe_value(value)}" for name, value in step.keywords.items())
+        return f"{_describe_step(step.func)}({', '.join(params)})"
+    return getattr(step, "__name__", repr(step))
+
+
+def _describe_value(value: Any) -> str:
+    if isinstance(value, (pd.DataFrame, pd.Series, Panel, PackedSignals, np.ndarray)):
+        return f"<{type(value).__name__} of shape {value.shape}>"
+    return repr(value)
+
+
+def _fingerprint(
+        value: pd.DataFrame | pd.Series | Panel | np.ndarray,
+        rows: Optional[np.ndarray] = None,
+) -> Hashable:
+    values = np.asarray(value)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_raw_bytes(values if rows is None else values[rows]))
+    if not isinstance(value, np.ndarray):
+        digest.update(pd.util.hash_pandas_object(value.index).to_numpy())
+    if isinstance(value, (pd.DataFrame, Panel)):
+        digest.update(pd.util.hash_pandas_object(value.columns).to_numpy())
+    return type(value).__name__, value.shape, values.dtype.str, digest.hexdigest()
+
+
+def _raw_bytes(values: np.ndarray) -> np.ndarray:
+    if values.dtype == object:
+        return pd.util.hash_array(values.ravel())
+    return np.ascontiguousarray(values).reshape(-1).view(np.uint8)
+
+
+def _sample_rows(n_rows: int, n_samples: int) -> np.ndarray:
+    return np.unique(np.linspace(0, n_rows - 1, min(n_rows, n_samples)).astype(int))
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True)))
+    if isinstance(value, Panel):
+        return value.values.nbytes + value.index.memory_usage() + value.columns.memory_usage()
+    if isinstance(value, PackedSignals):
+        return value.nbytes + value.index.memory_usage() + value.columns.memory_usage()
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)